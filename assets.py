@@ -0,0 +1,85 @@
+"""Loads each image once, when it is first drawn, and keeps scaled copies on disk for the next launch."""
+import glob
+import os
+
+import pygame
+
+
+class AssetManager:
+    """Hands out converted and scaled images by file name.
+
+    A file is only decoded the first time something asks for it, and never twice.
+    Scaled copies are also written to cache_dir as raw RGBA pixels named after the
+    source file's modification time and the size, so the next launch can skip
+    decoding and scaling the PNG. Editing the PNG changes its mtime, which makes
+    the old copies stale (they are deleted when the new one is written).
+    """
+    def __init__(self, directory='.', cache_dir=None):
+        self.directory = directory
+        self.cache_dir = cache_dir  # None turns the disk cache off
+        self.images = {}  # file name -> converted Surface
+        self.scaled = {}  # (file name, size, smooth) -> scaled Surface
+        self.decoded = 0  # Files read and decoded
+        self.disk_hits = 0  # Scaled images read back from the disk cache
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def image(self, name):
+        """Return the full size image, decoding the file the first time."""
+        if name not in self.images:
+            self.images[name] = pygame.image.load(self.path(name)).convert_alpha()
+            self.decoded += 1
+        return self.images[name]
+
+    def scaled_image(self, name, size, smooth=False):
+        """Return the image scaled to size, from memory, the disk cache or by scaling it now."""
+        key = (name, tuple(size), smooth)
+        if key not in self.scaled:
+            surface = self.read_cache(name, size, smooth)
+            if surface is None:
+                image = self.image(name)
+                if smooth and image.get_bitsize() in (24, 32):
+                    surface = pygame.transform.smoothscale(image, size)
+                else:
+                    surface = pygame.transform.scale(image, size)
+                self.write_cache(name, size, smooth, surface)
+            self.scaled[key] = surface
+        return self.scaled[key]
+
+    def cache_prefix(self, name, size, smooth):
+        stem = os.path.splitext(os.path.basename(name))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{size[0]}x{size[1]}{'-smooth' if smooth else ''}-")
+
+    def cache_path(self, name, size, smooth):
+        return f"{self.cache_prefix(name, size, smooth)}{os.stat(self.path(name)).st_mtime_ns}.rgba"
+
+    def read_cache(self, name, size, smooth):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self.cache_path(name, size, smooth), 'rb') as cache_file:
+                pixels = cache_file.read()
+        except OSError:
+            return None
+        if len(pixels) != size[0] * size[1] * 4:
+            return None  # Partly written or from an older format, scale it again
+        self.disk_hits += 1
+        return pygame.image.frombytes(pixels, size, 'RGBA').convert_alpha()
+
+    def write_cache(self, name, size, smooth, surface):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for stale in glob.glob(glob.escape(self.cache_prefix(name, size, smooth)) + '[0-9]*.rgba'):
+                os.remove(stale)  # Copies of an older version of the file
+            path = self.cache_path(name, size, smooth)
+            with open(path + '.tmp', 'wb') as cache_file:
+                cache_file.write(pygame.image.tobytes(surface, 'RGBA'))
+            os.replace(path + '.tmp', path)  # Never leave a half written copy under the real name
+        except OSError:
+            pass  # The cache only saves time, the app works without it
+
+    def stats(self):
+        return {"decoded": self.decoded, "disk_hits": self.disk_hits, "scaled": len(self.scaled)}
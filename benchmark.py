@@ -0,0 +1,326 @@
+"""Headless frame-time benchmark for every screen of the app.
+
+Runs the app on SDL's dummy video driver, fills it with 10, 1k and 100k tasks
+and rewards, and plays a fixed script of clicks, key presses and mouse wheel
+moves on each screen through ScreenManager.handle_event/draw. Reports p50/p99
+frame times and the peak memory allocated while each script runs.
+
+    python benchmark.py --save-baseline      # first, record the current numbers as the baseline
+    python benchmark.py                      # compare with benchmark_baseline.json
+    python benchmark.py --baseline old.json  # compare with another baseline (an error if it is missing)
+    python benchmark.py --sizes 10 1000 --screens Bingo Randomiser
+    python benchmark.py --profile --no-alloc  # also list the slowest widgets on each screen
+    python benchmark.py --startup             # time from launch to first frame, cold and warm asset cache
+    python benchmark.py --memory 1000000      # bytes per task and reward in a list of 1M
+
+Exits with status 1 if any p99 is slower than the baseline by more than the tolerance.
+Without a saved baseline nothing can regress, so CI should save one from the
+main branch and pass it with --baseline.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import tracker
+from indexed_list import IndexedList
+from search_index import SearchIndex
+from transfer import Record
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "design done.py")
+BASELINE_PATH = os.path.join(APP_DIR, "benchmark_baseline.json")
+FRAME_TIME = 1 / 60  # dt passed to every frame, so animations play out the same on every run
+FRAMES = 300  # Frames played per screen
+
+
+def load_app(database_path, asset_cache=""):
+    """Import the app without opening a real window or touching the user's saved tasks."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ["TASKTRACKER_DB"] = database_path
+    os.environ["TASKTRACKER_ASSET_CACHE"] = asset_cache  # Off unless a directory is given
+    os.chdir(APP_DIR)  # Images are loaded relative to the app
+    sys.path.insert(0, APP_DIR)
+    spec = importlib.util.spec_from_file_location("tasktracker_app", APP_PATH)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+def set_data(app, size):
+    """Replace the tasks and rewards with size generated items each, added through the tracker like an import."""
+    app.tracker.journal.clear()  # Undo history refers to the old items
+    app.tracker.samplers.clear()  # Weighted random picks are rebuilt from the new items when next needed
+    app.tracker.scheduler.clear()
+    app.tracker.due_soon.clear()
+    app.tasks.clear()
+    app.rewards.clear()
+    app.tracker.add_records("task", [Record(f"Task number {i} to do", False, False) for i in range(size)])
+    app.tracker.add_records("reward", [Record(f"Reward number {i}", False, False) for i in range(size)])
+    for item_list in (app.todo_list, app.rewards_list):
+        item_list.search_index = SearchIndex(item_list.task_list)  # Fully indexed, as the app's loop leaves it between frames
+        item_list.set_filter("", None)
+
+
+def click(pygame, pos):
+    return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos),
+            pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=pos)]
+
+
+def key(pygame, key_code, unicode=""):
+    return [pygame.event.Event(pygame.KEYDOWN, key=key_code, unicode=unicode, mod=0)]
+
+
+def motion(pygame, pos):
+    return [pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))]
+
+
+def menu_script(pygame, frame):
+    """Move the mouse over and off the menu buttons."""
+    positions = [(300, 135), (300, 190), (300, 245), (300, 300), (300, 355), (520, 30)]
+    return motion(pygame, positions[frame // 5 % len(positions)]) if frame % 5 == 0 else []
+
+
+def list_script(pygame, frame):
+    """Scroll with keys and the wheel, click rows to edit, and type to filter."""
+    step = frame % 60
+    if step < 10:
+        return key(pygame, pygame.K_DOWN)
+    if step in (15, 20, 25):
+        return [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=-1, flipped=False)]
+    if step == 30:
+        return click(pygame, (200, 90))
+    if step == 35:
+        return key(pygame, pygame.K_UP)  # Stop editing
+    if step in (40, 41, 42):
+        return key(pygame, pygame.K_a + step - 40, "abc"[step - 40])
+    if step == 45:
+        return key(pygame, pygame.K_TAB, "\t")
+    if step == 50:
+        return key(pygame, pygame.K_ESCAPE, "\x1b")
+    if 51 <= step < 59:
+        return key(pygame, pygame.K_UP)
+    return []
+
+
+def bingo_script(pygame, frame):
+    """Click through the bingo squares."""
+    if frame % 4:
+        return []
+    square = frame // 4 % 16
+    row, column = divmod(square, 4)
+    return click(pygame, (130 + column * 90 + 40, 30 + row * 90 + 40))
+
+
+def randomiser_script(pygame, frame):
+    """Spin the wheel, let it stop, and spin again."""
+    return click(pygame, (300, 200)) if frame % 250 == 0 else []
+
+
+def stats_script(pygame, frame):
+    """Go back to the menu and open the stats again and again (it should only read the running totals)."""
+    if frame % 30 == 0:
+        return click(pygame, (30, 30))  # Home
+    return click(pygame, (300, 355)) if frame % 30 == 15 else []
+
+
+SCREENS = {
+    "Menu": ("go_to_menu", menu_script),
+    "To-Do List": ("go_to_todo", list_script),
+    "Rewards": ("go_to_rewards", list_script),
+    "Bingo": ("go_to_bingo", bingo_script),
+    "Randomiser": ("go_to_randomiser", randomiser_script),
+    "Stats": ("go_to_stats", stats_script),
+}
+
+
+def play(app, screen_name, frames):
+    """Open a screen, play its script and return the time taken by each frame."""
+    import pygame
+    go_to, script = SCREENS[screen_name]
+    app.bingo_board.on_bingo = None  # A reward pop-up would cover the board for the rest of the script
+    if app.screen_manager.modal:
+        app.screen_manager.close_modal()
+    getattr(app, go_to)()
+    app.screen_manager.draw(app.screen)  # First, full redraw of the screen is not part of the script
+    times = []
+    for frame in range(frames):
+        events = script(pygame, frame)
+        start = time.perf_counter()
+        for event in events:
+            app.screen_manager.handle_event(event)
+        dirty_rects = app.screen_manager.draw(app.screen, FRAME_TIME)
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        end = time.perf_counter()
+        times.append(end - start)
+        app.profiler.record_frame(start, end)
+    return times
+
+
+def first_frame(database_path, asset_cache):
+    """Start the app in a new Python process and return the seconds until its first frame is shown."""
+    code = ("import sys, time, benchmark; app = benchmark.load_app(sys.argv[1], sys.argv[2]); "
+            "app.screen_manager.draw(app.screen); app.pygame.display.flip(); print(time.time()); "
+            "app.tracker.close()")
+    start = time.time()
+    output = subprocess.run([sys.executable, "-c", code, database_path, asset_cache],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True).stdout
+    return float(output.split()[-1]) - start
+
+
+def startup(data_dir, runs):
+    """Print the time to the first frame with an empty (cold) and a filled (warm) asset cache."""
+    database_path = os.path.join(data_dir, "startup.db")
+    asset_cache = os.path.join(data_dir, "assets")
+    first_frame(database_path, "")  # Create the database, so only the asset cache differs between runs
+    cold, warm = [], []
+    for _ in range(runs):
+        shutil.rmtree(asset_cache, ignore_errors=True)
+        cold.append(first_frame(database_path, asset_cache))
+        warm.append(first_frame(database_path, asset_cache))
+    print(f"first frame, cold asset cache: {1000 * min(cold):8.1f} ms (best of {runs})")
+    print(f"first frame, warm asset cache: {1000 * min(warm):8.1f} ms (best of {runs})")
+
+
+class DictTask:
+    """A task as it used to be stored (with a __dict__ and a bingo square back-reference), to compare against."""
+    def __init__(self, text):
+        self.text = text
+        self.complete = False
+        self.bingo_marked = False
+        self.square = None
+        self.id = None
+
+
+def item_memory(make_item, count):
+    """Return the bytes each item takes in an IndexedList of count items, not counting its text."""
+    texts = [f"Task number {i} to do" for i in range(count)]  # Made before tracing starts
+    tracemalloc.start()
+    items = IndexedList(make_item(text) for text in texts)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return size / count
+
+
+def memory(count):
+    """Print the bytes per task and reward (needs no window, only the display-free tracker)."""
+    print(f"{'item':10} {'bytes/item':>10} {'MiB for ' + str(count):>14}")
+    for name, make_item in (("Task", tracker.Task), ("Reward", tracker.Reward), ("dict Task", DictTask)):
+        per_item = item_memory(make_item, count)
+        print(f"{name:10} {per_item:10.1f} {per_item * count / 2 ** 20:14.1f}")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(app, screen_name, frames, track_allocations):
+    times = play(app, screen_name, frames)
+    result = {
+        "p50_ms": 1000 * percentile(times, 0.50),
+        "p99_ms": 1000 * percentile(times, 0.99),
+        "max_ms": 1000 * max(times),
+    }
+    if track_allocations:
+        # Play the script again under tracemalloc (which slows it down too much to time it at the same time)
+        tracemalloc.start()
+        play(app, screen_name, frames)
+        result["peak_alloc_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Return the (name, p99, baseline p99) of every run that got slower than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            allowed = baseline[name]["p99_ms"] * (1 + tolerance) + slack_ms
+            if result["p99_ms"] > allowed:
+                regressions.append((name, result["p99_ms"], baseline[name]["p99_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark drawing and event handling for every screen.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100_000], help="numbers of tasks and rewards")
+    parser.add_argument("--screens", nargs="+", default=list(SCREENS), choices=list(SCREENS))
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--full-redraw", action="store_true", help="turn off the dirty rectangle renderer")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the (slower) allocation pass")
+    parser.add_argument("--profile", action="store_true", help="time every widget too (slows down every frame)")
+    parser.add_argument("--startup", type=int, nargs="?", const=5, metavar="RUNS",
+                        help="only time launching the app to its first frame, cold and warm")
+    parser.add_argument("--memory", type=int, nargs="?", const=1_000_000, metavar="ITEMS",
+                        help="only measure the memory used per task and reward")
+    parser.add_argument("--baseline", help=f"numbers to compare with (default: {os.path.basename(BASELINE_PATH)})")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p99 slow down, 0.5 = 50%%")
+    parser.add_argument("--slack-ms", type=float, default=0.5, help="allowed p99 slow down in ms on top of the tolerance")
+    args = parser.parse_args()
+    if args.baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}, run with --save-baseline to record one")
+    baseline_path = args.baseline or BASELINE_PATH
+
+    if args.startup:
+        with tempfile.TemporaryDirectory() as data_dir:
+            startup(data_dir, args.startup)
+        return 0
+
+    if args.memory:
+        memory(args.memory)
+        return 0
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        app = load_app(os.path.join(data_dir, "benchmark.db"))
+        app.screen_manager.dirty_rect_mode = not args.full_redraw
+
+        results = {}
+        print(f"{'screen':12} {'items':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'peak KiB':>9}")
+        for size in args.sizes:
+            set_data(app, size)
+            for screen_name in args.screens:
+                if args.profile:
+                    app.profiler.disable()
+                    app.profiler.enable()  # Start counting from zero for this screen
+                result = measure(app, screen_name, args.frames, not args.no_alloc)
+                results[f"{screen_name}@{size}"] = result
+                peak = f"{result['peak_alloc_kib']:9.1f}" if "peak_alloc_kib" in result else f"{'-':>9}"
+                print(f"{screen_name:12} {size:7} {result['p50_ms']:8.3f} {result['p99_ms']:8.3f} {result['max_ms']:8.3f} {peak}")
+                if args.profile:
+                    for name, method, ms, surfaces in app.profiler.slowest(5):
+                        print(f"    {name[:40]:40} {method:12} {ms:8.3f} ms/frame {surfaces:6.1f} surfaces/frame")
+        app.profiler.disable()
+        app.tracker.close()
+
+    if args.save_baseline:
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}, run with --save-baseline to record one")
+        return 0
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+    for name, p99, baseline_p99 in regressions:
+        print(f"REGRESSION {name}: p99 {p99:.3f} ms (baseline {baseline_p99:.3f} ms)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Bingo card marks kept as one integer, with the winning lines of any N x N card worked out once."""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def line_masks(n):
+    """Return the bitmask of every row, column and both diagonals of an n x n card (square i is bit i)."""
+    rows = [((1 << n) - 1) << (row * n) for row in range(n)]
+    column = sum(1 << (row * n) for row in range(n))
+    columns = [column << col for col in range(n)]
+    diagonal = sum(1 << (i * n + i) for i in range(n))
+    anti_diagonal = sum(1 << (i * n + n - 1 - i) for i in range(n))
+    return tuple(dict.fromkeys(rows + columns + [diagonal, anti_diagonal]))  # A 1x1 card has just one line
+
+
+@lru_cache(maxsize=None)
+def lines_through(n):
+    """For each square, the line masks that go through it (at most 4)."""
+    masks = line_masks(n)
+    return tuple(tuple(mask for mask in masks if mask >> square & 1) for square in range(n * n))
+
+
+class BingoCard:
+    """Which squares of an n x n card are marked.
+
+    Marking a square only checks the (at most 4) lines through it, so finding
+    a win takes the same time whatever the size of the card. Marking every
+    square that has something on it (the full card) also wins, so a card with
+    too few items to fill a line can still be won.
+    """
+    def __init__(self, n=4):
+        self.n = n
+        self.lines = lines_through(n)
+        self.full_mask = (1 << n * n) - 1
+        self.marked = 0  # Bit i is set if square i is marked
+        self.empty = 0  # Bit i is set if square i has nothing on it, so no line through it can be won
+        self.won = set()  # Lines completed already, so marking a square again does not win them twice
+
+    def set_empty(self, square, empty=True):
+        """Say whether a square has nothing on it, and forget the lines won through it (it holds something new)."""
+        self.won.discard(self.occupied())  # The full card changes too
+        if empty:
+            self.empty |= 1 << square
+        else:
+            self.empty &= ~(1 << square)
+        self.won.difference_update(self.lines[square])
+
+    def occupied(self):
+        """Mask of the squares with something on them."""
+        return self.full_mask & ~self.empty
+
+    def is_won(self, mask):
+        return self.marked & mask == mask and not self.empty & mask
+
+    def mark(self, square, marked=True):
+        """Mark or unmark a square and return the lines through it (or the full card) that are complete for the first time."""
+        if not marked:
+            self.marked &= ~(1 << square)
+            return ()
+        self.marked |= 1 << square
+        lines = [mask for mask in self.lines[square] if mask not in self.won and self.is_won(mask)]
+        card = self.occupied()
+        if card and card not in self.won and card not in lines and self.is_won(card):
+            lines.append(card)
+        self.won.update(lines)
+        return tuple(lines)
+
+    def is_marked(self, square):
+        return bool(self.marked >> square & 1)
+
+    def complete_lines(self):
+        """Return every complete row, column and diagonal."""
+        return [mask for mask in line_masks(self.n) if self.is_won(mask)]
+
+    def is_full(self):
+        """Whether every square with something on it is marked."""
+        card = self.occupied()
+        return bool(card) and self.marked & card == card
@@ -1,10 +1,155 @@
 import pygame
+import os
+import csv
 import time
 import random
 import math
+import bisect
+import itertools
+from collections import OrderedDict, deque
+from search_index import SearchIndex
+from wheel_physics import start_speed, stop_time, spin_state, rest_angle, landing_speed, POINTER_ANGLE
+from profiler import Profiler
+from assets import AssetManager
+from hit_grid import HitGrid
+from bingo import BingoCard
+import transfer
+from weighted import WeightedSampler
+from tracker import Tracker, pick_weight, is_due_soon
+from scheduler import parse_schedule, schedule_tokens, due_label
+from history import BINGO, tasks_done, rewards_redeemed
+from replay import Recorder
+
+
+class TextCache:
+    """Shared LRU cache of rendered text surfaces."""
+    def __init__(self, max_size=512):
+        self.max_size = max_size  # Max number of surfaces kept at once
+        self.surfaces = OrderedDict()  # (font, text, color, antialias) -> Surface, oldest first
+        self.hits = 0  # Number of renders served from the cache
+        self.misses = 0  # Number of renders that had to call font.render
+
+    def render(self, font, text, color, antialias=True):
+        """Return a rendered surface for the text, rendering it only if it is not cached."""
+        key = (font, text, tuple(color), antialias)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)  # Mark as most recently used
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)  # Drop the least recently used surface
+        return surf
+
+    def invalidate(self, text=None):
+        """Forget cached surfaces for the given text (or everything if no text is given)."""
+        if text is None:
+            self.surfaces.clear()
+            return
+        for key in [key for key in self.surfaces if key[1] == text]:
+            del self.surfaces[key]
+
+    def stats(self):
+        """Return the hit/miss counters and current size of the cache."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.surfaces)}
+
+
+text_cache = TextCache()
+
+
+def wrap_text(font, text, width, split_words=True):
+    """Break text into lines no wider than width, splitting words that are too long on their own (if split_words)."""
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if font.size(candidate)[0] <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while split_words and len(word) > 1 and font.size(word)[0] > width:
+            cut = len(word) - 1
+            while cut > 1 and font.size(word[:cut])[0] > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    if line:
+        lines.append(line)
+    return lines
+
+
+class TextLayout:
+    """Fits text into a box: wraps it, shrinks the font until it fits and renders the lines.
+
+    Layouts are cached by (text, box size, colour, font sizes), so a square only
+    pays for wrapping and rendering when its text changes (or it changes size).
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size  # Max number of layouts kept at once
+        self.layouts = OrderedDict()  # key -> ((Surface, (x, y)), ...) with offsets from the box's top left
+        self.fonts = {}  # (font name, size) -> Font
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, name, size):
+        if (name, size) not in self.fonts:
+            self.fonts[(name, size)] = pygame.font.Font(name, size)
+        return self.fonts[(name, size)]
+
+    def fit(self, text, width, height, color, max_font_size, min_font_size=9, font_name=None):
+        """Return the rendered lines of text and where they go in a width x height box (centred)."""
+        key = (text, width, height, tuple(color), max_font_size, min_font_size, font_name)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.hits += 1
+            self.layouts.move_to_end(key)
+            return layout
+
+        self.misses += 1
+        font, lines = self.wrap_to_fit(text, width, height, max_font_size, min_font_size, font_name)
+        line_height = font.get_linesize()
+        y = (height - len(lines) * line_height) // 2
+        layout = []
+        for line in lines:
+            surf = text_cache.render(font, line, color)
+            layout.append((surf, ((width - surf.get_width()) // 2, y)))
+            y += line_height
+        layout = tuple(layout)
+        self.layouts[key] = layout
+        if len(self.layouts) > self.max_size:
+            self.layouts.popitem(last=False)  # Drop the least recently used layout
+        return layout
+
+    def wrap_to_fit(self, text, width, height, max_font_size, min_font_size, font_name):
+        """Return the largest font the text fits with and its lines, breaking words only if no size fits without."""
+        sizes = range(max_font_size, min_font_size - 1, -1)
+        for split_words in (False, True):
+            for size in sizes:
+                font = self.font(font_name, size)
+                lines = wrap_text(font, text, width, split_words)
+                if len(lines) * font.get_linesize() <= height and all(font.size(line)[0] <= width for line in lines):
+                    return font, lines
+        # Still too long at the smallest size, keep the lines that fit and mark the cut
+        lines = lines[:max(1, height // font.get_linesize())]
+        while len(lines[-1]) > 1 and font.size(lines[-1] + "...")[0] > width:
+            lines[-1] = lines[-1][:-1]
+        lines[-1] += "..."
+        return font, lines
+
+
+text_layout = TextLayout()
+
+########################################
 
 
 class Button:
+    shows_hover = True  # Whether the button looks different when the mouse is over it
+
     def __init__(self, x, y, width, height, text, font, color, hover_color, text_color, action=None):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
@@ -13,12 +158,34 @@ class Button:
         self.hover_color = hover_color
         self.text_color = text_color
         self.action = action
+        self.hovered = False  # Whether the mouse was over the button at the last mouse movement (set by the screen)
+        self.dirty = True  # Whether the button needs drawing again
+    
+    def wants_pointer(self):
+        """Whether clicks and hovering do anything (decorations let clicks through to what is under them)."""
+        return self.action is not None or self.shows_hover
+
+    def set_hovered(self, hovered):
+        if hovered != self.hovered:
+            self.hovered = hovered
+            if self.shows_hover:
+                self.dirty = True  # Hover colour changed
+
+    def mark_dirty(self):
+        """Ask for the button to be drawn again on the next frame."""
+        self.dirty = True
+
+    def get_dirty_rects(self):
+        """Return the areas that need drawing again and forget them."""
+        if not self.dirty:
+            return []
+        self.dirty = False
+        return [self.rect.copy()]
     
     def draw(self, screen):
-        mouse_pos = pygame.mouse.get_pos()
-        color = self.hover_color if self.rect.collidepoint(mouse_pos) else self.color
+        color = self.hover_color if self.hovered else self.color
         pygame.draw.rect(screen, color, self.rect, border_radius=10)  # Rounded corners
-        text_surf = self.font.render(self.text, True, self.text_color)
+        text_surf = text_cache.render(self.font, self.text, self.text_color)
         screen.blit(text_surf, text_surf.get_rect(center=self.rect.center))
     
     def handle_event(self, event):
@@ -29,64 +196,226 @@ class Button:
 ########################################
 
 class ImageButton(Button):
-    def __init__(self, x, y, width, height, image, action=None):
+    shows_hover = False  # The image is drawn the same with or without hover
+
+    def __init__(self, x, y, width, height, image, action=None, smooth=False):
         # Initialize the parent class (Button) with default values
         super().__init__(x, y, width, height, text='', font=None, color=None, hover_color=None, text_color=None, action=action)
-        self.image = image  # Store the image for the button
+        self.image = image  # File name, loaded and scaled through assets when the button is first drawn
+        self.smooth = smooth  # Use smoothscale (better quality, slower) instead of scale
+        self.button_image = None  # Scaled the first time it is drawn rather than every frame
+
+    def get_scaled_image(self):
+        """Return the image scaled to the button size, reusing a copy another button already made."""
+        return assets.scaled_image(self.image, (self.rect.width, self.rect.height), self.smooth)
+
+    def resize(self, width, height):
+        """Change the button size and rescale the image for it."""
+        self.rect.size = (width, height)
+        self.button_image = None  # Rescaled for the new size when next drawn
     
     def draw(self, screen):
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # No need to change the hover color logic since image is the main element
-        if self.rect.collidepoint(mouse_pos):
-            # Optionally, you can add a hover effect (e.g., scale or outline) here
-            pass
-        
-        # Draw the image scaled to the button size
-        button_image = pygame.transform.scale(self.image, (self.rect.width, self.rect.height))
-        screen.blit(button_image, self.rect.topleft)  # Draw the image at the button's position
+        # Draw the pre-scaled image
+        if self.button_image is None:
+            self.button_image = self.get_scaled_image()
+        screen.blit(self.button_image, self.rect.topleft)  # Draw the image at the button's position
 
 ########################################
 
 ########################################
 
 class Screen:
+    background_color = (114,165,119)
+    ###background_color = (178, 172, 136)  # original grey
+
+    pointer_events = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)  # Sent only to the widget under the mouse
+
     def __init__(self, buttons, home_button):
         self.buttons = buttons
         self.home_button = home_button
+        self.hit_grid = None  # Built from the widget rects the first time an event needs it
+        self.hovered = None  # Widget under the mouse at the last mouse movement
     
+    def widgets(self):
+        """Return every widget on the screen in the order they are drawn."""
+        return self.buttons + [self.home_button]
+
+    def layout_changed(self):
+        """Rebuild the hit grid on the next event (call after moving or resizing a widget)."""
+        self.hit_grid = None
+
+    def widget_at(self, pos):
+        """Return the topmost widget under pos that takes clicks, or None."""
+        if self.hit_grid is None:
+            self.hit_grid = HitGrid()
+            for widget in self.widgets():
+                if not hasattr(widget, "wants_pointer") or widget.wants_pointer():
+                    self.hit_grid.add(widget, widget.rect)
+        return self.hit_grid.at(pos)
+
+    def update_hover(self, pos):
+        """Work out which widget the mouse is over (once per mouse movement, not once per widget per frame)."""
+        widget = self.widget_at(pos)
+        if widget is not self.hovered:
+            if hasattr(self.hovered, "set_hovered"):
+                self.hovered.set_hovered(False)
+            if hasattr(widget, "set_hovered"):
+                widget.set_hovered(True)
+            self.hovered = widget
+
+    def update(self, dt=0):
+        """Advance anything that changes on its own by dt seconds (called once per frame before drawing)."""
+        for widget in self.widgets():
+            if hasattr(widget, "update"):
+                widget.update(dt)
+
+    def is_animating(self):
+        """Whether something on the screen moves every frame (so the loop cannot sleep)."""
+        return any(widget.is_animating() for widget in self.widgets() if hasattr(widget, "is_animating"))
+
     def draw(self, screen):
-        ###screen.fill((178, 172, 136))  # original grey
-        screen.fill((114,165,119))
+        screen.fill(self.background_color)
         for button in self.buttons:
             button.draw(screen)
         self.home_button.draw(screen)
     
+    def draw_dirty(self, screen):
+        """Redraw only the areas the widgets reported as changed and return them."""
+        widgets = self.widgets()
+        dirty_rects = []
+        for widget in widgets:
+            dirty_rects.extend(widget.get_dirty_rects())
+
+        for rect in dirty_rects:
+            screen.set_clip(rect)  # Keep overlapping widgets from drawing outside the dirty area
+            screen.fill(self.background_color, rect)
+            for widget in widgets:
+                if widget.rect.colliderect(rect):
+                    widget.draw(screen)
+        screen.set_clip(None)
+        return dirty_rects
+
+    def clear_dirty(self):
+        """Forget any pending dirty areas (after the whole screen has been drawn)."""
+        for widget in self.widgets():
+            widget.get_dirty_rects()
+
     def handle_event(self, event):
-        for button in self.buttons:
-            button.handle_event(event)
-        self.home_button.handle_event(event)
+        if event.type in self.pointer_events:
+            if event.type == pygame.MOUSEMOTION:
+                self.update_hover(event.pos)
+            widget = self.widget_at(event.pos)
+            if widget is not None:
+                widget.handle_event(event)
+        else:
+            for widget in self.widgets():  # Keys and the mouse wheel go to every widget
+                widget.handle_event(event)
 
 class ScreenManager:
-    def __init__(self):
+    def __init__(self, dirty_rect_mode=False):
         self.screens = {}
         self.current_screen = None
+        self.dirty_rect_mode = dirty_rect_mode  # Only redraw the parts of the screen that changed
+        self.full_redraw = True  # Whether the next frame has to draw the whole screen
+        self.modal = None  # Pop-up drawn over the current screen, gets every event while open
     
     def add_screen(self, name, screen):
         self.screens[name] = screen
+        screen.name = name  # Shown in the profiler
+        if name == self.current_screen:
+            self.full_redraw = True  # The screen being shown was rebuilt
+            screen.update_hover(pygame.mouse.get_pos())
     
     def set_screen(self, name):
         if name in self.screens:
             self.current_screen = name
-    
-    def draw(self, screen):
+            self.full_redraw = True
+            self.screens[name].update_hover(pygame.mouse.get_pos())  # The mouse may already be over a button
+
+    def request_full_redraw(self):
+        """Draw the whole screen on the next frame (e.g. after something drew over it)."""
+        self.full_redraw = True
+
+    def show_modal(self, modal):
+        """Show a pop-up over the current screen until it closes itself."""
+        self.modal = modal
+        self.full_redraw = True
+
+    def close_modal(self):
+        self.modal = None
+        self.full_redraw = True  # Bring back the screen under the pop-up
         if self.current_screen:
-            self.screens[self.current_screen].draw(screen)
+            self.screens[self.current_screen].update_hover(pygame.mouse.get_pos())
     
-    def handle_event(self, event):
+    def draw(self, screen, dt=0):
+        """Advance the current screen by dt seconds and draw it (or the pop-up over it).
+
+        Returns the list of rects that changed, or None if the whole screen was drawn.
+        """
+        if self.modal:
+            current = self.modal  # The screen underneath is paused while a pop-up is open
+        elif self.current_screen:
+            current = self.screens[self.current_screen]
+            current.update(dt)
+        else:
+            return []
+        if not self.dirty_rect_mode or self.full_redraw:
+            current.draw(screen)
+            current.clear_dirty()
+            self.full_redraw = False
+            return None
+        return current.draw_dirty(screen)
+    
+    def is_animating(self):
+        if self.modal:
+            return False
         if self.current_screen:
+            return self.screens[self.current_screen].is_animating()
+        return False
+
+    def handle_event(self, event):
+        if self.modal:
+            self.modal.handle_event(event)
+            if self.modal.closed:
+                self.close_modal()
+        elif self.current_screen:
             self.screens[self.current_screen].handle_event(event)
 
+
+class FrameStats:
+    """Keeps track of how long recent frames took so idle CPU use can be checked."""
+    def __init__(self, history=600):
+        self.work_times = deque(maxlen=history)  # Seconds spent handling events and drawing each frame
+        self.frame_times = deque(maxlen=history)  # Seconds between the start of each frame (includes waiting)
+        self.frames = 0
+        self.idle_frames = 0  # Frames where the loop slept in event.wait instead of ticking
+        self.last_frame_start = None
+
+    def start_frame(self):
+        now = time.perf_counter()
+        if self.last_frame_start is not None:
+            self.frame_times.append(now - self.last_frame_start)
+        self.last_frame_start = now
+        return now
+
+    def end_frame(self, frame_start, idle):
+        self.work_times.append(time.perf_counter() - frame_start)
+        self.frames += 1
+        if idle:
+            self.idle_frames += 1
+
+    def summary(self):
+        """Return average work/frame time in ms and the fraction of time spent working."""
+        work = sum(self.work_times)
+        elapsed = sum(self.frame_times)
+        return {
+            "frames": self.frames,
+            "idle_frames": self.idle_frames,
+            "avg_work_ms": 1000 * work / len(self.work_times) if self.work_times else 0,
+            "avg_frame_ms": 1000 * elapsed / len(self.frame_times) if self.frame_times else 0,
+            "busy": work / elapsed if elapsed else 0,
+        }
+
 ########################################
 
 ########################################
@@ -94,53 +423,188 @@ class ScreenManager:
 ########################################
 
 class ScrollingTaskList:
+    kind = "task"  # Which of the tracker's lists this shows
+
     def __init__(self, x, y, width, height, font, task_list, max_items, scroll_speed=2):
         self.rect = pygame.Rect(x, y, width, height)
         self.font = font
         self.task_list = task_list  # List of Task objects
         self.max_items = max_items  # Max items to display at once
-        self.scroll_speed = scroll_speed  # Speed of scrolling
-        self.offset = 0  # Vertical offset to manage scrolling
+        self.scroll_speed = scroll_speed  # Rows moved per arrow key press
+        self.scroll_y = 0  # Pixels scrolled from the top of the list
+        self.scroll_target = 0  # Where scroll_y is gliding to
+        self.wheel_step = 40  # Pixels scrolled per mouse wheel notch
         self.selected_task = None  # To track the selected task
         self.editing_task = None  # To track the task being edited
         self.editing_text = ""  # The text being typed for editing
         self.last_click_time = 0  # Track the time of the last click
         self.double_click_threshold = 300  # 300 ms threshold for double click
         self.double_click_task = None  # Task that was double-clicked (if any)
+        self.caret_blink_time = 500  # ms between caret blinks while editing
+        self.caret_visible = True  # Whether the caret is currently shown in the edit box
+        self.search_index = SearchIndex(task_list, background=True)  # Word prefix index of the items, filled in by index_lists()
+        self.filter_text = ""  # Text typed (while not editing) to filter the list
+        self.filter_complete = None  # Only show complete (True), incomplete (False) or due soon ("due") items, None for all
+        self.filtered = None  # Items matching the filter, None when the list is not filtered
+        self.weight_step = 2  # PageUp/PageDown multiply/divide the selected item's weight by this
+        self.dirty = True  # Whether the list needs drawing again
+    
+    def mark_dirty(self):
+        """Ask for the list to be drawn again on the next frame."""
+        self.dirty = True
+
+    def get_dirty_rects(self):
+        """Return the areas that need drawing again and forget them."""
+        if not self.dirty:
+            return []
+        self.dirty = False
+        return [self.rect.copy()]
     
+    def shown(self):
+        """Return the items being shown: the whole list, or the ones matching the filter."""
+        return self.task_list if self.filtered is None else self.filtered
+
+    def rows(self):
+        """Number of rows shown at once (the filter bar takes the top row while filtering)."""
+        return self.max_items if self.filtered is None else self.max_items - 1
+
+    def list_area(self):
+        """Return the part of the list where rows are drawn."""
+        item_height = self.font.get_height()
+        top = self.rect.y + 10 + (self.max_items - self.rows()) * item_height
+        return pygame.Rect(self.rect.x + 10, top, self.rect.width - 20, self.rows() * item_height)
+
+    def max_scroll(self):
+        return max(0, (len(self.shown()) - self.rows()) * self.font.get_height())
+
+    def row_rect(self, index):
+        """Return where the row for a position in shown() is drawn at the current scroll position."""
+        item_height = self.font.get_height()
+        return pygame.Rect(self.rect.x + 10, self.list_area().y + index * item_height - self.scroll_y, self.rect.width - 20, item_height)
+
+    def set_filter(self, text, complete):
+        """Show only the items with words starting with the typed words (and the given completion status)."""
+        self.filter_text = text
+        self.filter_complete = complete
+        self.scroll_y = self.scroll_target = 0
+        self.selected_task = None
+        self.editing_task = None
+        self.refresh_filter()
+
+    def refresh_filter(self):
+        """Recompute which items match the filter after the list changed."""
+        old_filtered = self.filtered
+        if not self.filter_text and self.filter_complete is None:
+            self.filtered = None
+        elif self.filter_complete == "due":
+            due = tracker.due_soon_items()  # Only the few tasks due soon are sorted, not the whole list
+            if self.filter_text:
+                matches = set(self.search_index.search(self.filter_text))
+                due = [item for item in due if item in matches]
+            self.filtered = due
+        else:
+            self.filtered = self.search_index.search(self.filter_text, self.filter_complete)
+        if self.filtered != old_filtered:
+            # Rows moved, so the selected (or edited) row number would now point at a different item
+            self.selected_task = None
+            self.editing_task = None
+        self.dirty = True
+
+    def pick(self, rng=random):
+        """Return a random item, weighted and leaving out completed ones (None if there are none)."""
+        return tracker.pick(self.kind, rng)
+
+    def change_weight(self, factor):
+        """Make the selected item more (factor > 1) or less likely to be picked."""
+        if self.selected_task is not None and self.selected_task < len(self.shown()):
+            item = self.shown()[self.selected_task]
+            tracker.set_weight(item, item.weight * factor)
+
+    def draw_filter_bar(self, screen):
+        """Draw what the list is being filtered by above the rows."""
+        bar = pygame.Rect(self.rect.x + 10, self.rect.y + 10, self.rect.width - 20, self.font.get_height())
+        pygame.draw.rect(screen, (220, 235, 222), bar)
+        status = {None: "", False: " [to do]", True: " [done]", "due": " [due soon]"}[self.filter_complete]
+        text_surf = text_cache.render(self.font, f"Search: {self.filter_text}{status}  ({len(self.filtered)})", (0, 0, 0))
+        screen.blit(text_surf, bar.topleft)
+
     def draw(self, screen):
-        """Draw the task list and handle scrolling."""
+        """Draw the visible part of the task list."""
         # Draw the background for the list
         pygame.draw.rect(screen, (158, 198, 162), self.rect)  # Light gray background (200,200,200)
         
-        # Calculate how many tasks can fit in the list
+        # Only the rows that are (partly) on screen are looked at, however long the list is
         item_height = self.font.get_height()
-        visible_tasks = self.task_list[self.offset:self.offset + self.max_items]
+        first = self.scroll_y // item_height
+        visible_tasks = self.shown()[first:first + self.rows() + 1]
+        if self.filtered is not None:
+            self.draw_filter_bar(screen)
 
-        # Draw each visible task
+        old_clip = screen.get_clip()
+        screen.set_clip(self.list_area().clip(old_clip))  # Rows scrolled half out of view are cut off
         for i, task in enumerate(visible_tasks):
-            # Set the text color based on task completion
-            text_color = (0, 0, 255) if task.complete else (0, 0, 0)  # Blue if complete, black if not
-            text_surf = self.font.render(task.text, True, text_color)  # Task text with the appropriate color
-            task_rect = pygame.Rect(self.rect.x + 10, self.rect.y + 10 + i * item_height, self.rect.width - 20, item_height)
-            pygame.draw.rect(screen, (255, 255, 255), task_rect)  # White background for each task
-            screen.blit(text_surf, (self.rect.x + 10, self.rect.y + 10 + i * item_height))
-            
-            # Highlight selected task
-            if self.selected_task == i + self.offset:
-                pygame.draw.rect(screen, (0, 255, 0), task_rect, 3)  # Green border for the selected task
+            self.draw_item(screen, task, self.row_rect(first + i), first + i)
 
         # If editing, draw the text box for editing
         if self.editing_task is not None:
-            edit_box = pygame.Rect(self.rect.x + 10, self.rect.y + 10 + (self.editing_task - self.offset) * item_height, self.rect.width - 20, item_height)
+            edit_box = self.row_rect(self.editing_task)
             pygame.draw.rect(screen, (255, 255, 255), edit_box)  # White background for input box
-            input_surf = self.font.render(self.editing_text, True, (0, 0, 0))
+            input_surf = text_cache.render(self.font, self.editing_text, (0, 0, 0))
             screen.blit(input_surf, (edit_box.x, edit_box.y))  # Draw the input text inside the box
+            self.draw_caret(screen, edit_box, input_surf)
             pygame.draw.rect(screen, (0, 255, 0), edit_box, 3)
+        screen.set_clip(old_clip)
+
+    def draw_item(self, screen, task, task_rect, index):
+        """Draw one row of the list."""
+        # Set the text color based on task completion
+        text_color = (0, 0, 255) if task.complete else (0, 0, 0)  # Blue if complete, black if not
+        text_surf = text_cache.render(self.font, task.text, text_color)  # Task text with the appropriate color
+        pygame.draw.rect(screen, (255, 255, 255), task_rect)  # White background for each task
+        screen.blit(text_surf, task_rect.topleft)
+        right = task_rect.right - 5
+        if task.weight != 1:
+            weight_surf = text_cache.render(self.font, f"x{task.weight:g}", (120, 120, 120))  # More or less likely to be picked
+            screen.blit(weight_surf, weight_surf.get_rect(topright=(right, task_rect.top)))
+            right -= weight_surf.get_width() + 10
+        if getattr(task, "due", None) is not None:
+            due_color = (200, 0, 0) if not task.complete and is_due_soon(task) else (120, 120, 120)  # Red when due soon or overdue
+            due_surf = text_cache.render(self.font, due_label(task.due), due_color)
+            screen.blit(due_surf, due_surf.get_rect(topright=(right, task_rect.top)))
+
+        # Highlight selected task
+        if self.selected_task == index:
+            pygame.draw.rect(screen, (0, 255, 0), task_rect, 3)  # Green border for the selected task
+
+    def update(self, dt=0):
+        """Glide towards the scroll target and blink the caret while editing."""
+        self.scroll_target = min(self.scroll_target, self.max_scroll())  # The list may have got shorter
+        if self.scroll_y != self.scroll_target:
+            distance = self.scroll_target - self.scroll_y
+            step = int(distance * 0.3) or (1 if distance > 0 else -1)  # Ease out, but always move
+            self.scroll_y += step
+            self.dirty = True
+
+        if self.editing_task is not None:
+            caret_visible = (get_ticks() // self.caret_blink_time) % 2 == 0
+            if caret_visible != self.caret_visible:
+                self.caret_visible = caret_visible
+                self.dirty = True
+
+    def draw_caret(self, screen, edit_box, input_surf):
+        """Draw the caret after the text being edited."""
+        if self.caret_visible:
+            caret_x = edit_box.x + input_surf.get_width() + 2
+            pygame.draw.line(screen, (0, 0, 0), (caret_x, edit_box.y + 4), (caret_x, edit_box.bottom - 4), 2)
+
+    def is_animating(self):
+        """Whether the list is still gliding to a new scroll position."""
+        return self.scroll_y != self.scroll_target
 
     def handle_event(self, event):
         """Handle key events for scrolling and task selection."""
         if event.type == pygame.KEYDOWN:
+            self.dirty = True  # Scrolling, editing or saving all change what is shown
             if event.key == pygame.K_DOWN:
                 self.scroll_down()
                 self.selected_task = None  # Reset selected task
@@ -152,41 +616,71 @@ class ScrollingTaskList:
             elif event.key == pygame.K_RETURN:  # Save the edited task
                 self.save_task()
                 self.editing_task = None  # Stop editing
+            elif event.key == pygame.K_PAGEUP:
+                self.change_weight(self.weight_step)
+            elif event.key == pygame.K_PAGEDOWN:
+                self.change_weight(1 / self.weight_step)
+            elif self.editing_task is None:
+                self.handle_filter_key(event)  # Typing while not editing filters the list
             elif event.key == pygame.K_BACKSPACE and self.editing_text:  # Handle backspace
                 self.editing_text = self.editing_text[:-1]
             elif event.unicode:  # Handle character input
-                if len(self.editing_text) < 35:  # Add new character only if length is less than 35
+                text = parse_schedule(self.editing_text)[0] if self.kind == "task" else self.editing_text  # due: and rec: do not count
+                if len(text) < 35:  # Add new character only if length is less than 35
                     self.editing_text += event.unicode
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.rect.collidepoint(event.pos):
                 self.select_task(event.pos)
+                self.dirty = True
+        elif event.type == pygame.MOUSEWHEEL:
+            self.scroll_by(-event.y * self.wheel_step)
+        elif event.type == pygame.DROPFILE:  # A CSV, JSON Lines or todo.txt file dropped on the window
+            start_import(self, event.file)
     
+    def handle_filter_key(self, event):
+        """Type to filter, Backspace to delete, Tab to switch between all/to do/done/due soon, Escape to clear."""
+        if event.key == pygame.K_ESCAPE:
+            self.set_filter("", None)
+        elif event.key == pygame.K_TAB:
+            next_status = {None: False, False: True, True: "due" if self.kind == "task" else None, "due": None}[self.filter_complete]
+            self.set_filter(self.filter_text, next_status)
+        elif event.key == pygame.K_BACKSPACE:
+            if self.filter_text:
+                self.set_filter(self.filter_text[:-1], self.filter_complete)
+        elif event.unicode and event.unicode.isprintable() and len(self.filter_text) < 35:
+            self.set_filter(self.filter_text + event.unicode, self.filter_complete)
+
+    def scroll_by(self, pixels):
+        """Start gliding the list by a number of pixels (stopping at the top and bottom)."""
+        self.scroll_target = max(0, min(self.scroll_target + pixels, self.max_scroll()))
+
     def scroll_down(self):
         """Scroll down in the list."""
-        if self.offset + self.max_items < len(self.task_list):
-            self.offset += self.scroll_speed
-        else:
-            self.offset = len(self.task_list) - self.max_items  # Stop scrolling at the bottom
+        self.scroll_by(self.scroll_speed * self.font.get_height())
     
     def scroll_up(self):
         """Scroll up in the list.""" 
-        if self.offset > 0:
-            self.offset -= self.scroll_speed
-        else:
-            self.offset = 0  # Stop scrolling at the top
+        self.scroll_by(-self.scroll_speed * self.font.get_height())
     
+    def task_at(self, mouse_pos):
+        """Return the list position of the row under the mouse (or None)."""
+        area = self.list_area()
+        if not area.collidepoint(mouse_pos):
+            return None
+        index = (mouse_pos[1] - area.y + self.scroll_y) // self.font.get_height()
+        return index if index < len(self.shown()) else None
+
     def select_task(self, mouse_pos):
         """Select a task when clicked."""
-        item_height = self.font.get_height()
-        index = (mouse_pos[1] - self.rect.y - 10) // item_height
-        if 0 <= index < self.max_items:
-            task_index = index + self.offset
-            
-            current_time = pygame.time.get_ticks()  # Get the current time in milliseconds
+        task_index = self.task_at(mouse_pos)
+        if task_index is not None:
+            current_time = get_ticks()  # Get the current time in milliseconds
             if current_time - self.last_click_time <= self.double_click_threshold:
                 # Double-click detected, toggle the complete status
-                task = self.task_list[task_index]
-                task.toggle_complete()  # Toggle the task's completion status
+                task = self.shown()[task_index]
+                tracker.toggle_complete(task)  # Toggle the task's completion status and save it
+                if self.filter_complete is not None:
+                    self.refresh_filter()  # The task may no longer match the filter
             else:
                 # Single-click detected, just select the task
                 self.selected_task = task_index
@@ -197,39 +691,75 @@ class ScrollingTaskList:
     def start_editing_task(self, task_index):
         """Start editing a task."""
         self.editing_task = task_index
-        self.editing_text = self.task_list[task_index].text  # Pre-fill the input box with the current task
+        task = self.shown()[task_index]
+        self.editing_text = task.text  # Pre-fill the input box with the current task
+        if self.kind == "task":
+            self.editing_text += schedule_tokens(task.due, task.repeat)  # Edited as due:2026-10-20 rec:weekly
     
     def save_task(self):
         """Save the edited task."""
         if self.editing_task is not None:
-            self.task_list[self.editing_task].text = self.editing_text  # Update the task's text
+            task = self.shown()[self.editing_task]
+            text_cache.invalidate(task.text)  # Old text will not be drawn again
+            if self.kind == "task":
+                text, due, repeat = parse_schedule(self.editing_text)
+                tracker.update(task, text=text, due=due, repeat=repeat)  # Update the task's text and due date (can be undone)
+            else:
+                tracker.update(task, text=self.editing_text)  # Update the task's text
+            self.search_index.update(task)
             self.editing_task = None  # Stop editing
             self.editing_text = ""  # Clear the text input field
 
     def add_task(self, task):
         """Add a task to the list."""
-        self.task_list.append(Task(task))  # Add a new Task object
+        item = tracker.add(self.kind, task)  # Add a new Task (or Reward) object to the end of task_list
+        self.search_index.add(item)
+        if self.filtered is not None:
+            self.refresh_filter()
+        self.dirty = True
     
+    def change_applied(self, change):
+        """Bring the search index and filter up to date after an undo or redo changed an item (see Tracker.apply_change)."""
+        action, item = change[0], change[1]
+        if item.kind != self.kind:
+            return
+        if action == "insert":
+            # Put back where it was, so filtered results stay in list order
+            index = change[2]
+            previous = self.task_list[index - 1] if index > 0 else None
+            following = self.task_list[index + 1] if index + 1 < len(self.task_list) else None
+            self.search_index.insert(item, previous, following)
+        else:
+            {"remove": self.search_index.remove, "fields": self.search_index.update}[action](item)
+        self.selected_task = None
+        self.editing_task = None
+        if self.filtered is not None:
+            self.refresh_filter()
+        self.dirty = True
+
+    def import_batch(self, records):
+        """Add a batch of records with one save and one refresh of the list."""
+        items = tracker.add_records(self.kind, records)
+        for item in items:
+            self.search_index.add(item)
+        if self.filtered is not None:
+            self.refresh_filter()
+        self.dirty = True
+
     def remove_task(self):
         """Remove the selected task from the list."""
         if self.selected_task is not None:
-            self.task_list.pop(self.selected_task)
+            if self.filtered is None:
+                item = self.task_list[self.selected_task]
+                tracker.remove(item, self.selected_task)
+            else:
+                item = self.filtered.pop(self.selected_task)
+                tracker.remove(item)
+            self.search_index.remove(item)
+            self.dirty = True
             self.selected_task = None  # Reset selected task
             self.editing_task = None  # Stop editing
 
-class Task:
-    def __init__(self, text):
-        self.text = text
-        self.complete = False  # Attribute to track if the task is complete
-        self.bingo_marked = False
-        self.square = None
-
-
-    def toggle_complete(self):
-        """Toggle the completion status of the task."""
-        self.complete = not self.complete
-
-        
 ########################################
 
 ########################################
@@ -237,81 +767,28 @@ class Task:
 ########################################
 
 
-class Reward:
-    def __init__(self, text):
-        self.text = text  # Reward description
-        self.complete = False  # Completion status of the reward (True if redeemed)
-
-    def toggle_complete(self):
-        """Toggle the completion status of the reward."""
-        self.complete = not self.complete
-
-
 class ScrollingRewardList(ScrollingTaskList):
+    kind = "reward"
+
     def __init__(self, x, y, width, height, font, reward_list, max_items, scroll_speed=2):
         # Reuse the ScrollingTaskList and its functionality
         super().__init__(x, y, width, height, font, reward_list, max_items, scroll_speed)
         self.reward_list = self.task_list  # Reuse the task list
     
-    def draw(self, screen):
-        """Draw the reward list and handle scrolling."""
-        # Call the draw method of ScrollingTaskList to handle the drawing
-        super().draw(screen)
-        
-        # Modify text drawing for Rewards - strike-through if complete
-        item_height = self.font.get_height()
-        visible_rewards = self.reward_list[self.offset:self.offset + self.max_items]
-
-        for i, reward in enumerate(visible_rewards):
-            text_color = (0, 0, 255) if reward.complete else (0, 0, 0)  # Blue if complete, black if not
-            
-            if reward.complete:
-                # Draw strikethrough for completed rewards
-                pygame.draw.line(screen, text_color, 
-                                 (self.rect.x + 10, self.rect.y + 10 + i * item_height + item_height // 2),
-                                 (self.rect.x + self.rect.width - 10, self.rect.y + 10 + i * item_height + item_height // 2), 
-                                 2)  # Strikethrough line
-            
-            # Use the base task rendering code
-            text_surf = self.font.render(reward.text, True, text_color)  
-            reward_rect = pygame.Rect(self.rect.x + 10, self.rect.y + 10 + i * item_height, self.rect.width - 20, item_height)
-            pygame.draw.rect(screen, (255, 255, 255), reward_rect)  # White background for each reward
-            screen.blit(text_surf, (self.rect.x + 10, self.rect.y + 10 + i * item_height))
-        
-            # Highlight selected reward
-            if self.selected_task == i + self.offset:
-                pygame.draw.rect(screen, (0, 255, 0), reward_rect, 3)  # Green border for the selected reward
-        
-        # If editing, draw the text box for editing
-        if self.editing_task is not None:
-            edit_box = pygame.Rect(self.rect.x + 10, self.rect.y + 10 + (self.editing_task - self.offset) * item_height, self.rect.width - 20, item_height)
-            pygame.draw.rect(screen, (255, 255, 255), edit_box)  # White background for input box
-            input_surf = self.font.render(self.editing_text, True, (0, 0, 0))
-            screen.blit(input_surf, (edit_box.x, edit_box.y))  # Draw the input text inside the box
-            pygame.draw.rect(screen, (0, 255, 0), edit_box, 3)
+    def draw_item(self, screen, reward, reward_rect, index):
+        """Draw one reward, struck through if it has been redeemed."""
+        super().draw_item(screen, reward, reward_rect, index)
+        if reward.complete:
+            # Draw strikethrough for completed rewards
+            pygame.draw.line(screen, (0, 0, 255), (reward_rect.x, reward_rect.centery), (reward_rect.right, reward_rect.centery), 2)
     
     def select_reward(self, mouse_pos):
         """Select a reward when clicked."""
-        item_height = self.font.get_height()
-        index = (mouse_pos[1] - self.rect.y - 10) // item_height
-        if 0 <= index < self.max_items:
-            reward_index = index + self.offset
-
+        reward_index = self.task_at(mouse_pos)
+        if reward_index is not None:
             # Single-click detected, just select the reward and start editing it
             self.selected_task = reward_index
             self.start_editing_task(reward_index)
-    
-    def start_editing_task(self, reward_index):
-        """Start editing a reward."""
-        self.editing_task = reward_index
-        self.editing_text = self.reward_list[reward_index].text  # Pre-fill the input box with the current reward text
-    
-    def save_task(self):
-        """Save the edited reward."""
-        if self.editing_task is not None:
-            self.reward_list[self.editing_task].text = self.editing_text  # Update the reward's text
-            self.editing_task = None  # Stop editing
-            self.editing_text = ""  # Clear the text input field
 
 
 
@@ -324,46 +801,147 @@ class ScrollingRewardList(ScrollingTaskList):
             
 
 class SpinningWheel:
-    def __init__(self, x, y, radius, rewards):
+    rotation_cache_size = 32  # Rotated copies of the face kept, one per whole degree of angle
+
+    def __init__(self, x, y, radius, rewards, font=None, label_font=None, seed=None):
         self.x = x
         self.y = y
         self.radius = radius
         self.tasks = tasks
+        self.font = font  # Font for the "You won" label under the wheel
+        self.label_font = label_font  # Font for the item names on the segments
+        self.face = None  # Segments and labels drawn once at angle 0
+        self.face_key = None  # Item texts and weights the face was drawn for
+        self.segment_ends = []  # Angle on the face where each item's segment ends (segments are sized by weight)
+        self.sampler = WeightedSampler()  # Picks the segment (by index) each spin stops on
+        self.rotated_faces = OrderedDict()  # whole degree -> rotated face, least recently used first
+        self.rng = random.Random(seed)  # Own random generator so spins can be repeated from a seed
         self.angle = 0
         self.spinning = False
-        self.spin_speed = 0
+        self.spin_speed = 0  # Starting speed of the current spin in degrees per second
+        self.spin_start_angle = 0
+        self.spin_time = None  # Seconds since the current spin started (None until its first frame)
         self.selected_task = None
+        # Area covered by the wheel, its pointer and the label (which can be wider than the wheel)
+        self.rect = pygame.Rect(x - radius * 2, y - radius - 10, radius * 4, radius * 2 + 10)
+        if font:
+            self.rect.height += font.get_linesize()  # Rendered text can be taller than get_height()
+        self.dirty = True  # Whether the wheel needs drawing again
+
+    def get_dirty_rects(self):
+        """Return the areas that need drawing again and forget them."""
+        if not self.dirty:
+            return []
+        self.dirty = False
+        return [self.rect.copy()]
     
+    def is_animating(self):
+        return self.spinning
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.start_spin()
+
     def start_spin(self):
         if not self.spinning:
             self.spinning = True
-            self.spin_speed = random.uniform(20, 30)  # Random speed
+            self.spin_start_angle = self.angle % 360
+            self.spin_time = None
+            if self.face is None:
+                self.refresh_face()
+            index = self.sampler.pick(self.rng)
+            if index is None:
+                self.spin_speed = start_speed(self.rng)  # Nothing to win, just spin
+            else:
+                # Pick the segment first (weighted, O(1)), then a speed that stops the wheel on it
+                start = self.segment_ends[index - 1] if index else 0
+                width = self.segment_ends[index] - start
+                face_angle = start + width * self.rng.uniform(0.1, 0.9)  # Keep clear of the edges
+                self.spin_speed = landing_speed(self.spin_start_angle, face_angle, self.rng)
     
-    def update(self):
+    def update(self, dt=0):
+        """Move the wheel on by dt seconds (the result does not depend on how time is split into frames)."""
         if self.spinning:
-            self.angle += self.spin_speed
-            self.spin_speed *= 0.98  # Gradually slow down
-            if abs(self.spin_speed) < 0.5:  # Use absolute value for smoother stop
+            if self.spin_time is None:
+                self.spin_time = 0  # Time starts at the first frame, not at the idle wait before the click
+            else:
+                self.spin_time += dt
+            self.dirty = True
+            if self.spin_time >= stop_time(self.spin_speed):
+                self.angle = rest_angle(self.spin_start_angle, self.spin_speed)
                 self.spinning = False
                 self.select_task()
+            else:
+                self.angle = spin_state(self.spin_start_angle, self.spin_speed, self.spin_time)[0]  # Gradually slow down
     
     def select_task(self):
-        segment_angle = 360 / len(self.tasks)
-        selected_index = int((-self.angle % 360) // segment_angle)
+        if not self.segment_ends or not self.segment_ends[-1]:
+            return  # Nothing on the wheel can be won
+        face_angle = (POINTER_ANGLE - self.angle) % 360  # Part of the face under the pointer
+        selected_index = min(bisect.bisect_right(self.segment_ends, face_angle), len(self.segment_ends) - 1)
         self.selected_task = self.tasks[selected_index]
+
+    def refresh_face(self):
+        """Redraw the wheel face if the items or their weights changed since it was last drawn."""
+        weights = [pick_weight(task) for task in self.tasks]
+        face_key = tuple(zip((task.text for task in self.tasks), weights))
+        if face_key != self.face_key:
+            self.face_key = face_key
+            total = sum(weights)
+            self.segment_ends = list(itertools.accumulate(weight * 360 / total for weight in weights)) if total else [0.0] * len(weights)
+            self.sampler = WeightedSampler(range(len(weights)), weights.__getitem__)
+            self.face = self.draw_face()
+            self.rotated_faces.clear()
+            self.dirty = True
+
+    def draw_face(self):
+        """Draw every segment and its label onto a surface, with the wheel at angle 0."""
+        size = self.radius * 2 + 2
+        face = pygame.Surface((size, size), pygame.SRCALPHA)
+        centre = size // 2
+        segments = [(start, end, task) for start, end, task in zip([0.0] + self.segment_ends, self.segment_ends, self.tasks) if end > start]
+        for colour_index, (start, end, task) in enumerate(segments):  # Items with no weight get no segment
+            arc_steps = max(1, int((end - start) // 3))  # Points along the rim so segments are round, not triangles
+            points = [(centre, centre)]
+            for step in range(arc_steps + 1):
+                angle = math.radians(start + step / arc_steps * (end - start))
+                points.append((centre + self.radius * math.cos(angle), centre + self.radius * math.sin(angle)))
+            pygame.draw.polygon(face, COLORS[colour_index % len(COLORS)], points)
+
+        if self.label_font:
+            max_width = int(self.radius * 0.75)
+            for start, end, task in segments:
+                if end - start < 6:
+                    continue  # Thinner segments have no room for text
+                text = task.text
+                while text and self.label_font.size(text)[0] > max_width:
+                    text = text[:-1]  # Cut names that do not fit between the centre and the rim
+                label = text_cache.render(self.label_font, text, BLACK)
+                middle = (start + end) / 2
+                label = pygame.transform.rotate(label, -middle)  # Read outwards along the segment
+                distance = self.radius * 0.55
+                label_centre = (centre + distance * math.cos(math.radians(middle)), centre + distance * math.sin(math.radians(middle)))
+                face.blit(label, label.get_rect(center=label_centre))
+        return face
+
+    def rotated_face(self):
+        """Return the face turned to the current angle (to the nearest degree)."""
+        if self.face is None:
+            self.refresh_face()
+        degrees = int(round(self.angle)) % 360
+        rotated = self.rotated_faces.get(degrees)
+        if rotated is None:
+            rotated = pygame.transform.rotate(self.face, -degrees)  # rotate() turns anticlockwise
+            self.rotated_faces[degrees] = rotated
+            if len(self.rotated_faces) > self.rotation_cache_size:
+                self.rotated_faces.popitem(last=False)
+        else:
+            self.rotated_faces.move_to_end(degrees)
+        return rotated
     
     def draw(self, screen):
-        segment_angle = 360 / len(self.tasks)
-        for i in range(len(self.tasks)):
-            start_angle = math.radians(self.angle + i * segment_angle)
-            end_angle = math.radians(self.angle + (i + 1) * segment_angle)
-            color = COLORS[i % len(COLORS)]
-            
-            pygame.draw.polygon(screen, color, [
-                (self.x, self.y),
-                (self.x + self.radius * math.cos(start_angle), self.y + self.radius * math.sin(start_angle)),
-                (self.x + self.radius * math.cos(end_angle), self.y + self.radius * math.sin(end_angle))
-            ])
+        rotated = self.rotated_face()
+        screen.blit(rotated, rotated.get_rect(center=(self.x, self.y)))
         
         pygame.draw.circle(screen, BLACK, (self.x, self.y), self.radius, 3)
         
@@ -373,122 +951,140 @@ class SpinningWheel:
             (self.x + 10, self.y - self.radius + 10)
         ])
 
+        if self.font and self.selected_task:
+            reward_text = text_cache.render(self.font, f"You won: {self.selected_task.text}", BLACK)
+            screen.blit(reward_text, (self.x - reward_text.get_width() // 2, self.y + self.radius))
 
-########################################
 
 ########################################
 
 ########################################
 
+########################################
 
-def add_newline_between_words(input_string):
-    words = input_string.split()  # Split the string into a list of words
-    return '\n'.join(words)  # Join the words with a newline character
-
-def remove_newlines_and_replace_with_spaces(input_string):
-    return input_string.replace('\n', ' ')
 
 class BingoSquare(Button):
-    def __init__(self, x, y, size, text, font, action=None):
+    padding = 4  # Space kept between the text and the border
+
+    def __init__(self, x, y, size, text, font, action=None, font_size=18):
         super().__init__(x, y, size, size, text, font, (255, 255, 255), (200, 200, 200), (0, 0, 0), action)
+        self.font_size = font_size  # Largest font size the text is drawn at (smaller if it does not fit)
         self.marked = False  # Whether the square has been marked
         self.index = 0
+        self.task = None  # Task shown in this square (None for an empty "-" square)
+        self.task_text = None  # Task text the square was laid out for
+        self.lines = self.layout_lines()  # Rendered lines and their positions, worked out once
     
+    def layout_lines(self):
+        """Wrap the text to fit the square (shrinking the font if needed) and work out where each line goes."""
+        inner = self.rect.inflate(-2 * self.padding, -2 * self.padding)
+        layout = text_layout.fit(self.text, inner.width, inner.height, self.text_color, self.font_size)
+        return [(surf, surf.get_rect(topleft=(inner.x + x, inner.y + y))) for surf, (x, y) in layout]
+
     def draw(self, screen):
         # Draw the square with the marked status
         color = (0, 255, 0) if self.marked else (255, 255, 255)  # Green if marked, white if not
         pygame.draw.rect(screen, color, self.rect)
         pygame.draw.rect(screen, (0, 0, 0), self.rect, 2)  # Border
 
-        lines = self.text.split('\n')
-        total_text_height = sum(self.font.size(line)[1] for line in lines)
-        current_y = self.rect.top + (self.rect.height - total_text_height) // 2
-        for line in lines:
-            text_surf = self.font.render(line, True, self.text_color)
-            text_rect = text_surf.get_rect(center=(self.rect.centerx, current_y))
+        for text_surf, text_rect in self.lines:
             screen.blit(text_surf, text_rect)
-            current_y += self.font.size(line)[1]
         
 
     def toggle(self):
         # Toggle the marked state of the square
         self.marked = not self.marked
+        self.dirty = True
 
-        if self.marked:
-            for z in range (len(tasks)):
-                if z == self.index:
-                    tasks[z].bingo_marked = True
-        else:
-            for z in range (len(tasks)):
-                if z == self.index:
-                    tasks[z].bingo_marked = False
+        if self.task is not None:  # Empty "-" squares have no task to save
+            tracker.update(self.task, bingo_marked=self.marked)  # Saved, and can be undone
 
 
 
 class BingoBoard:
-    def __init__(self, x, y, size, font):
+    def __init__(self, x, y, size, font, n=4, on_bingo=None):
         self.x = x
         self.y = y
         self.size = size
         self.font = font
+        self.n = n  # Squares per row and column
+        self.on_bingo = on_bingo  # Called when a click completes a row, column or diagonal
         self.squares = []  # List of BingoSquare objects
-
-        # Bingo board structure (5x5)
-        #numbers = random.sample(range(1, 76), 16)  # Random numbers 1-75, 24 numbers for the board
+        self.card = BingoCard(n)  # Marks as a bitmask, for finding a bingo
+        self.rect = pygame.Rect(x, y, n * (size + 10) - 10, n * (size + 10) - 10)  # Area covered by the board
 
         # Create Bingo squares and add them to the list
-        for i in range(4):
-            for j in range(4):
-                if len(tasks) - 1 >= (i * 4 + j):
-                    text = add_newline_between_words(tasks[i * 4 + j].text)
-                else:
-                    text = "-"
-                square = BingoSquare(self.x + j * (size + 10), self.y + i * (size + 10), size, text, self.font, self.toggle_square)
-
-                if len(tasks) - 1 >= (i * 4 + j):
-                    tasks[i * 4 + j].square = square
-                    square.index = (i * 4 + j)
-                else:
-                    square.marked = True
-                
-                self.squares.append(square)
-
-    def toggle_square(self):
-        # Handle toggling square on click
-        pass
+        for position in range(n * n):
+            self.squares.append(self.make_square(position))
+            self.card.set_empty(position, self.squares[position].task is None)  # Lines through a "-" square never count
+            self.card.mark(position, self.squares[position].marked)
+
+    def make_square(self, position):
+        """Build the square for one board position from the task currently in that slot."""
+        i, j = divmod(position, self.n)
+        if len(tasks) - 1 >= position:
+            text = tasks[position].text  # Wrapped to the square by text_layout
+        else:
+            text = "-"
+        square = BingoSquare(self.x + j * (self.size + 10), self.y + i * (self.size + 10), self.size, text, self.font,
+                             font_size=max(9, min(18, self.size // 4)))  # Smaller text on smaller squares
+
+        if len(tasks) - 1 >= position:
+            task = tasks[position]
+            square.task = task  # The square knows its task, the task does not know about the board
+            square.task_text = task.text
+            square.marked = task.bingo_marked
+            square.index = position
+        else:
+            square.marked = True
+        return square
+
+    def toggle_square(self, position):
+        """Mark or unmark a square and give a reward if that made a bingo."""
+        square = self.squares[position]
+        square.toggle()
+        if self.card.mark(position, square.marked) and self.on_bingo:
+            self.on_bingo()
 
     def draw(self, screen):
         # Draw all the squares
         for square in self.squares:
             square.draw(screen)
 
+    def get_dirty_rects(self):
+        """Return the areas of squares that need drawing again and forget them."""
+        dirty_rects = []
+        for square in self.squares:
+            dirty_rects.extend(square.get_dirty_rects())
+        return dirty_rects
+
+    def square_at(self, pos):
+        """Return the position of the square under pos worked out from its row and column, or None (e.g. in a gap)."""
+        column, x = divmod(pos[0] - self.x, self.size + 10)
+        row, y = divmod(pos[1] - self.y, self.size + 10)
+        if 0 <= row < self.n and 0 <= column < self.n and x < self.size and y < self.size:
+            return row * self.n + column
+        return None
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            for square in self.squares:
-                if square.rect.collidepoint(event.pos):
-                    square.toggle()  # Toggle the marked state when clicked
+            position = self.square_at(event.pos)
+            if position is not None:
+                self.toggle_square(position)  # Toggle the marked state when clicked
 
     def refresh_board(self):
-        self.squares = []
-        for i in range(4):
-            for j in range(4):
-                if len(tasks) - 1 >= (i * 4 + j):
-                    text = add_newline_between_words(tasks[i * 4 + j].text)
-                else:
-                    text = "-"
-
-                square = BingoSquare(self.x + j * (self.size + 10), self.y + i * (self.size + 10), self.size, text, self.font, self.toggle_square)
-                if len(tasks) - 1 >= (i * 4 + j):
-                    if tasks[i * 4 + j].bingo_marked == True:
-                        square.marked = True
-                    square.index = (i * 4 + j)
-                else:
-                    square.marked = True
-                
-                self.squares.append(square)
-
-
-
+        """Bring the board in line with the tasks list, rebuilding only the squares that changed."""
+        for position, square in enumerate(self.squares):
+            task = tasks[position] if len(tasks) - 1 >= position else None
+            if square.task is not task or (task is not None and square.task_text != task.text):
+                # A task was added, removed or edited in this slot, so lay the square out again
+                self.squares[position] = self.make_square(position)
+                self.card.set_empty(position, task is None)
+                self.card.mark(position, self.squares[position].marked)
+            elif task is not None and square.marked != task.bingo_marked:
+                square.marked = task.bingo_marked  # Only the mark changed, keep the laid out text
+                square.dirty = True
+                self.card.mark(position, square.marked)
 
 
 
@@ -499,18 +1095,139 @@ class BingoScreen(Screen):
         self.reward_button = reward_button
         self.vine_button = vine_button
 
-    def draw(self, screen):
+    def widgets(self):
+        return [self.bingo_board, self.home_button, self.reward_button, self.vine_button]
+
+    def update(self, dt=0):
         self.bingo_board.refresh_board()
-        screen.fill((114,165,119)) 
+
+    def draw(self, screen):
+        screen.fill(self.background_color) 
         self.bingo_board.draw(screen)
         self.home_button.draw(screen)
         self.reward_button.draw(screen)
         self.vine_button.draw(screen)
 
+
+class RandomiserScreen(Screen):
+    def __init__(self, buttons, home_button, wheel):
+        super().__init__(buttons, home_button)
+        self.wheel = wheel
+
+    def widgets(self):
+        # Home button last so it is on top of the wheel's area, where the two overlap
+        return self.buttons + [self.wheel, self.home_button]
+
+    def draw(self, screen):
+        screen.fill(self.background_color)
+        for widget in self.widgets():
+            widget.draw(screen)
+
+class RewardPopup:
+    """Pop-up showing a reward with an "OK" button, drawn by the ScreenManager over the current screen."""
+    def __init__(self, text, font, screen_size, width=300, height=150):
+        # Define pop-up size and position
+        x, y = (screen_size[0] - width) // 2, (screen_size[1] - height) // 2
+        self.rect = pygame.Rect(x, y, width, height)
+        self.closed = False
+
+        # Render reward text once, it does not change while the pop-up is open
+        self.text_surf = text_cache.render(font, text, (0, 0, 0))
+        self.text_rect = self.text_surf.get_rect(center=(x + width // 2, y + 40))
+
+        # Create an "OK" button to close the pop-up
+        self.button = Button(x + (width - 100) // 2, y + 90, 100, 40, "OK", font, (0, 200, 0), (0, 255, 0), (255, 255, 255), self.close)
+
+    def close(self):
+        self.closed = True
+
+    def draw_popup(self, screen):
+        # Draw the pop-up rectangle
+        pygame.draw.rect(screen, (255, 255, 255), self.rect)
+        pygame.draw.rect(screen, (0, 0, 0), self.rect, 3)  # Border
+        screen.blit(self.text_surf, self.text_rect)
+        self.button.draw(screen)
+
+    def draw(self, screen):
+        screen.fill(Screen.background_color)
+        self.draw_popup(screen)
+
+    def draw_dirty(self, screen):
+        """Redraw the pop-up if the button changed and return the area drawn."""
+        if not self.button.get_dirty_rects():
+            return []
+        self.draw_popup(screen)
+        return [self.rect.copy()]
+
+    def clear_dirty(self):
+        self.button.get_dirty_rects()
+
     def handle_event(self, event):
-        self.bingo_board.handle_event(event)
-        self.home_button.handle_event(event)
-        self.reward_button.handle_event(event)
+        if event.type == pygame.MOUSEMOTION:
+            self.button.set_hovered(self.button.rect.collidepoint(event.pos))
+        self.button.handle_event(event)
+
+
+class StatsChart:
+    """Tasks done on each of the last days as bars, with today's, this week's and all-time totals.
+
+    Everything comes from the history's running totals, so opening the screen never reads the event log.
+    """
+    def __init__(self, x, y, width, height, font, label_font, days=14):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.font = font
+        self.label_font = label_font
+        self.days = days  # Bars shown, ending today
+        self.bars = []  # (day of the month, tasks done) for each bar
+        self.lines = []  # Totals shown under the chart
+        self.dirty = True
+
+    def refresh(self):
+        """Read the latest totals (when the screen is shown)."""
+        history = tracker.history
+        self.bars = [(f"{date.day}", tasks_done(counts)) for date, counts in history.last_days(self.days)]
+        self.lines = []
+        for name, counts in (("Today", history.day()), ("This week", history.week()), ("All time", history.all_time)):
+            self.lines.append(f"{name}: {tasks_done(counts)} tasks, {counts[BINGO]} bingos, {rewards_redeemed(counts)} rewards")
+        best = history.best_week()
+        if best:
+            self.lines.append(f"Best week: {best[0]} with {tasks_done(best[1])} tasks")
+        self.dirty = True
+
+    def get_dirty_rects(self):
+        if not self.dirty:
+            return []
+        self.dirty = False
+        return [self.rect.copy()]
+
+    def handle_event(self, event):
+        pass
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, (158, 198, 162), self.rect)
+        title_surf = text_cache.render(self.label_font, f"Tasks done, last {self.days} days", (0, 0, 0))
+        screen.blit(title_surf, (self.rect.x + 10, self.rect.y + 8))
+
+        # One bar per day, scaled to the best day shown
+        chart = pygame.Rect(self.rect.x + 10, self.rect.y + 40, self.rect.width - 20, 130)
+        slot = chart.width // max(1, len(self.bars))
+        highest = max([done for _, done in self.bars] + [1])
+        for i, (day, done) in enumerate(self.bars):
+            bar_height = chart.height * done // highest
+            bar = pygame.Rect(chart.x + i * slot + 3, chart.bottom - bar_height, slot - 6, bar_height)
+            pygame.draw.rect(screen, (255, 255, 255), bar)
+            if done:
+                count_surf = text_cache.render(self.label_font, str(done), (0, 0, 0))
+                screen.blit(count_surf, count_surf.get_rect(midbottom=(bar.centerx, bar.top - 2)))
+            day_surf = text_cache.render(self.label_font, day, (0, 0, 0))
+            screen.blit(day_surf, day_surf.get_rect(midtop=(bar.centerx, chart.bottom + 4)))
+
+        y = chart.bottom + 28
+        for line in self.lines:
+            line_surf = text_cache.render(self.label_font if line.startswith("Best") else self.font, line, (0, 0, 0))
+            screen.blit(line_surf, (self.rect.x + 10, y))
+            y += line_surf.get_height() + 4
+
 
 ##################################
 
@@ -524,45 +1241,36 @@ pygame.init()
 screen = pygame.display.set_mode((600, 400))
 font = pygame.font.Font(None, 36)
 bingoFont = pygame.font.Font(None,18)
-screen_manager = ScreenManager()
+screen_manager = ScreenManager(dirty_rect_mode=True)
 
 # Constants
 WIDTH, HEIGHT = 600, 400
+FPS = 60  # Frame rate while something is animating
+IDLE_WAIT = True  # Sleep in event.wait while nothing is animating instead of redrawing at FPS
+IDLE_TIMEOUT = 250  # ms to sleep at most while idle (keeps the caret blinking)
+SCHEDULE_EVENT = pygame.event.custom_type()  # Posted by a pygame timer when the next task comes due (or soon)
+MAX_TIMER_WAIT = 60 * 60 * 1000  # ms the schedule timer waits at most before it is set again
+PROFILE_KEY = pygame.K_F3  # Turns the profiler and its overlay on and off
+TRACE_KEY = pygame.K_F4  # Saves what the profiler recorded as a Chrome trace
+TRACE_PATH = 'profile_trace.json'
+get_ticks = pygame.time.get_ticks  # ms clock for the caret and double clicks (replay.py sets it from a recording)
+UNDO_KEY, REDO_KEY = pygame.K_z, pygame.K_y  # With Ctrl (Ctrl+Shift+Z also redoes)
+UNDO_MEMORY = 256 * 1024  # Rough bytes of undo history kept before the oldest changes are forgotten
+BINGO_SIZE = 4  # Squares per row and column on the bingo board
+DATABASE_PATH = os.environ.get('TASKTRACKER_DB', 'tasktracker.db')  # Where tasks, rewards and bingo marks are saved
+RECORD_PATH = os.environ.get('TASKTRACKER_RECORD')  # Where to record this session's input for replay.py (None: not recorded)
+ASSET_CACHE_DIR = os.environ.get('TASKTRACKER_ASSET_CACHE', '.asset_cache')  # Scaled images saved for the next launch ('' turns it off)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 165, 0)]
 
-# Create tasks
-# Create example tasks
-tasks = [
-    Task("Go Shopping"),
-    Task("Clean my Room"),
-    Task("Finish Coursework"),
-    Task("Call mom"),
-    Task("Go on a walk"),
-    Task("Read a book"),
-    Task("Write some code"),
-    Task("Pay bills"),
-    Task("Plan weekend trip"),
-    Task("Check emails"),
-    Task("Walk the dog"),
-    Task("Organize workspace"),
-    Task("Fix bugs in the project"),
-    Task("Check trains")
-]
-
+assets = AssetManager('.', ASSET_CACHE_DIR or None)  # Images are loaded once, when a screen first draws them
 
-# Create example rewards (similar to tasks)
-rewards = [
-    Reward("Have a Hot Chocolate"),
-    Reward("Takeaway tonight"),
-    Reward("Movie night"),
-    Reward("Weekend trip"),
-    Reward("Spa evening"),
-    Reward("Gift card"),
-    Reward("Chocolate"),
-    Reward("Watch YouTube"),
-]
+# Tasks and rewards are loaded (or the examples saved on the first run) by the display-free tracker
+tracker = Tracker(DATABASE_PATH, journal_bytes=UNDO_MEMORY)
+tasks = tracker.items("task")
+rewards = tracker.items("reward")
+importing = None  # (list the items go to, batches of records still to add) while a dropped file is imported
 
 
 
@@ -586,75 +1294,116 @@ def go_to_rewards():
 def go_to_bingo():
     screen_manager.set_screen("Bingo")
     pygame.display.set_caption('Bingo Board')
-    bingo_board = BingoBoard(130, 30, 80, bingoFont)
-    bingo_screen = (bingo_board, home_button, reward_button, vine_button2)
+    bingo_board.refresh_board()
 
 # Function to go to Randomiser screen
 def go_to_randomiser():
     screen_manager.set_screen("Randomiser")
     pygame.display.set_caption('Randomiser')
-    generate_randomiser_page()
+    wheel.refresh_face()  # Tasks may have been added, removed or edited since it was last shown
+
+def show_message(text):
+    """Tell the user something in a pop-up, made wide enough for the text."""
+    width = min(screen.get_width() - 20, max(300, font.size(text)[0] + 40))
+    screen_manager.show_modal(RewardPopup(text, font, screen.get_size(), width=width))
+
+def start_import(item_list, path):
+    """Add the items in a dropped file to a list, one batch per frame so the window keeps responding."""
+    global importing
+    if importing is not None:
+        show_message("Still importing the last file, drop this one once it is done")
+        return
+    importing = (item_list, transfer.batched(transfer.read(path)))
+
+def run_import():
+    """Add the next batch of the file being imported (called every frame, whatever screen is showing)."""
+    global importing
+    if importing is None:
+        return
+    item_list, batches = importing
+    try:
+        item_list.import_batch(next(batches))
+    except StopIteration:
+        importing = None
+    except (OSError, ValueError, csv.Error) as error:
+        importing = None  # Batches already added are kept
+        show_message(f"Import failed: {error}")
+
+def index_lists():
+    """Index the words of a chunk more items for filtering (called every frame); returns whether any are left."""
+    indexes = [todo_list.search_index, rewards_list.search_index]
+    for index in indexes:
+        if index.pending:
+            index.index_some()  # One list at a time, so a frame only does one chunk
+            break
+    return any(index.pending for index in indexes)
+
+def arm_schedule_timer(next_time):
+    """Have pygame post SCHEDULE_EVENT when the next task event is due, which wakes the idle loop (None turns it off)."""
+    if next_time is None:
+        pygame.time.set_timer(SCHEDULE_EVENT, 0)
+    else:
+        wait = min(MAX_TIMER_WAIT, max(1, int((next_time - time.time()) * 1000) + 1))
+        pygame.time.set_timer(SCHEDULE_EVENT, wait, loops=1)
+
+def run_schedule():
+    """Handle the task events that are due and remind the user of tasks that have just come due."""
+    reminders = tracker.run_due()
+    todo_list.dirty = True  # Due dates may have turned red
+    if todo_list.filtered is not None:
+        # A task that came due joins the "due" filter in due date order, so this also stops
+        # any edit (or selection) that was open, rather than leave it on a neighbouring task
+        todo_list.refresh_filter()
+    if reminders:
+        more = f" (+{len(reminders) - 1} more)" if len(reminders) > 1 else ""
+        screen_manager.show_modal(RewardPopup(f"Due: {reminders[0].text}{more}", font, screen.get_size()))
+
+# Function to go to the Stats screen
+def go_to_stats():
+    stats_chart.refresh()
+    screen_manager.set_screen("Stats")
+    pygame.display.set_caption('Stats')
+
+def bingo_won():
+    tracker.record_bingo()
+    random_reward()  # Reward pops up on a bingo
+
+def undo(redo=False):
+    """Undo (or redo) the last change to the tasks, rewards or bingo board and update whatever shows it."""
+    change = tracker.redo() if redo else tracker.undo()
+    if change is None:
+        return
+    todo_list.change_applied(change)
+    rewards_list.change_applied(change)
+    if screen_manager.current_screen == "Randomiser":
+        wheel.refresh_face()
+    # The bingo board checks its tasks every frame it is shown
 
 def random_reward():
-    # Define pop-up size and position
-    popup_width, popup_height = 300, 150
-    popup_x, popup_y = (screen.get_width() - popup_width) // 2, (screen.get_height() - popup_height) // 2
-    popup_rect = pygame.Rect(popup_x, popup_y, popup_width, popup_height)
-
-    selected_reward = random.choice(rewards).text
-
-    # Create an "OK" button to close the pop-up
-    button = Button(popup_x + 100, popup_y + 90, 100, 40, "OK", font, (0, 200, 0), (0, 255, 0), (255, 255, 255))
-
-    running = True
-    while running:
-        screen.fill((114,165,119))  # Background color
-
-        # Draw the pop-up rectangle
-        pygame.draw.rect(screen, (255, 255, 255), popup_rect)
-        pygame.draw.rect(screen, (0, 0, 0), popup_rect, 3)  # Border
-
-        # Render reward text
-        text_surf = font.render(selected_reward, True, (0, 0, 0))
-        text_rect = text_surf.get_rect(center=(popup_x + popup_width // 2, popup_y + 40))
-        screen.blit(text_surf, text_rect)
-
-        # Draw the button
-        button.draw(screen)
-
-        pygame.display.flip()
-
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-            button.handle_event(event)
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if button.rect.collidepoint(event.pos):  # Close pop-up when "OK" is clicked
-                    running = False
+    reward = rewards_list.pick()  # Weighted, and never one that has already been redeemed
+    selected_reward = reward.text if reward else "No rewards left!"
+    screen_manager.show_modal(RewardPopup(selected_reward, font, screen.get_size()))
 
 
 ############# ART #################
 
-title_image = pygame.image.load('title_image.png').convert_alpha()
-title_button = ImageButton(x=90,y=5,width=450,height=100,image=title_image, action= None)
+# Images are given by file name, so nothing is read from disk until a screen draws it
+title_button = ImageButton(x=90,y=5,width=450,height=100,image='title_image.png', action= None)
 
-logo_image = pygame.image.load('logo_image.png').convert_alpha()
-logo_button = ImageButton(x=430,y=150,width=180,height=300,image=logo_image, action= None)
-logo_button2 = ImageButton(x=450,y=150,width=180,height=300,image=logo_image, action= None)
+logo_button = ImageButton(x=430,y=150,width=180,height=300,image='logo_image.png', action= None)
+logo_button2 = ImageButton(x=450,y=150,width=180,height=300,image='logo_image.png', action= None)
 
-vine_image = pygame.image.load('vine_image.png').convert_alpha()
-vine_button = ImageButton(x=-30,y=20,width=200,height=450,image=vine_image, action= None)
-vine_button2 = ImageButton(x=-60,y=20,width=200,height=450,image=vine_image, action= None)
+vine_button = ImageButton(x=-30,y=20,width=200,height=450,image='vine_image.png', action= None)
+vine_button2 = ImageButton(x=-60,y=20,width=200,height=450,image='vine_image.png', action= None)
 
 ##################################
 
 menu_buttons = [
-    Button(200, 120, 200, 50, "To-Do List", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_todo),
-    Button(200, 180, 200, 50, "Rewards", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_rewards),
-    Button(200, 240, 200, 50, "Bingo", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_bingo),
-    Button(200, 300, 200, 50, "Randomiser", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_randomiser),
+    Button(200, 110, 200, 50, "To-Do List", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_todo),
+    Button(200, 165, 200, 50, "Rewards", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_rewards),
+    Button(200, 220, 200, 50, "Bingo", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_bingo),
+    Button(200, 275, 200, 50, "Randomiser", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_randomiser),
+    Button(200, 330, 200, 50, "Stats", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_stats),
     title_button,
     logo_button,
     vine_button
@@ -662,16 +1411,12 @@ menu_buttons = [
 
 #home_button = Button(10, 10, 50, 50, "🏠", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), go_to_menu)
 
-house_image = pygame.image.load('house_image.png').convert_alpha()
-home_button = ImageButton(x=5,y=5,width=50,height=50,image=house_image, action= go_to_menu)
-
-title_image = pygame.image.load('title_image.png').convert_alpha()
-title_button = ImageButton(x=50,y=5,width=300,height=50,image=title_image, action= None)
+home_button = ImageButton(x=5,y=5,width=50,height=50,image='house_image.png', action= go_to_menu)
 
 reward_button = Button(490, 340, 100, 50, "Reward", font, (255, 255, 255), (200, 200, 200), (0, 0, 0), random_reward)
 
 
-bingo_board = BingoBoard(130, 30, 80, bingoFont)
+bingo_board = BingoBoard(130, 30, 360 // BINGO_SIZE - 10, bingoFont, BINGO_SIZE, on_bingo=bingo_won)  # Logged, and a reward pops up
 bingo_screen = BingoScreen(bingo_board, home_button, reward_button, vine_button2)
 
 # Adding screens with buttons and home button
@@ -681,7 +1426,11 @@ screen_manager.add_screen("Menu", Screen(menu_buttons, home_button))
 screen_manager.add_screen("Bingo", bingo_screen)  # Add Bingo screen
 
 
-screen_manager.add_screen("Randomiser", Screen([vine_button, logo_button2], home_button))
+wheel = SpinningWheel(WIDTH // 2, HEIGHT // 2, 150, rewards, font, bingoFont)
+screen_manager.add_screen("Randomiser", RandomiserScreen([vine_button, logo_button2], home_button, wheel))
+
+stats_chart = StatsChart(50, 60, 500, 320, font, bingoFont)
+screen_manager.add_screen("Stats", Screen([stats_chart], home_button))
 
 # Set initial screen to Menu
 screen_manager.set_screen("Menu")
@@ -703,13 +1452,11 @@ def generate_todo_list():
     screen_manager.add_screen("To-Do List", Screen([todo_list, add_button, remove_button], home_button))
 
 def add_task():
-    todo_list.add_task("New task")
-    generate_todo_list()  # Refresh screen after adding the task
+    todo_list.add_task("New task")  # The list redraws itself, the screen does not need rebuilding
 
 
 def remove_task():
     todo_list.remove_task()
-    generate_todo_list()  # Refresh screen after removing the task
 
 # Generate the To-Do List screen when accessing it
 generate_todo_list()
@@ -723,45 +1470,114 @@ def generate_rewards_page():
 
 def add_reward():
     rewards_list.add_task("New Reward")  # Add a new reward to the list
-    generate_rewards_page()  # Refresh screen after adding the reward
 
 def remove_reward():
     rewards_list.remove_task()  # Remove the selected reward
-    generate_rewards_page()  # Refresh screen after removing the reward
 
 # Generate the Rewards page when accessing it
 generate_rewards_page()
 
-wheel = SpinningWheel(WIDTH // 2, HEIGHT // 2, 150, rewards)
-
-def generate_randomiser_page():
-    wheel.update()
-    wheel.draw(screen)
-    if wheel.selected_task:
-        reward_text = font.render(f"You won: {wheel.selected_task.text}", True, BLACK)
-        screen.blit(reward_text, (WIDTH // 2 - reward_text.get_width() // 2, HEIGHT - 50))
-    pygame.display.flip()
-
-
-# Game loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if not wheel.spinning:
-                wheel.start_spin()
-        screen_manager.handle_event(event)  # Handle screen events
-    
-    screen_manager.draw(screen)
-
-    if screen_manager.current_screen == "Randomiser":
-        generate_randomiser_page()
-
-    # Frame rate limit
-    pygame.time.Clock().tick(60)
 
-    pygame.display.flip()
-
-pygame.quit()
+# Times every widget and screen once turned on with PROFILE_KEY (or TASKTRACKER_PROFILE=1)
+profiler = Profiler([Button, ImageButton, BingoSquare, BingoBoard, ScrollingTaskList, ScrollingRewardList, SpinningWheel,
+                     Screen, BingoScreen, RandomiserScreen, RewardPopup, StatsChart],
+                    allocation_counters=[lambda: text_cache.misses])  # Every cache miss renders a new text surface
+if os.environ.get('TASKTRACKER_PROFILE'):
+    profiler.enable()
+
+
+def handle_event(event):
+    """Handle one event from the event loop (or a replayed recording); returns False once the window is closed."""
+    if event.type == pygame.QUIT:
+        return False
+    if event.type == SCHEDULE_EVENT:
+        run_schedule()
+    elif event.type == pygame.KEYDOWN and event.key == PROFILE_KEY:
+        profiler.toggle()
+        screen_manager.request_full_redraw()  # Draw over (or clear away) the overlay
+    elif event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and event.key in (UNDO_KEY, REDO_KEY):
+        undo(redo=event.key == REDO_KEY or bool(event.mod & pygame.KMOD_SHIFT))
+    elif event.type == pygame.KEYDOWN and event.key == TRACE_KEY:
+        if profiler.enabled:
+            profiler.export_chrome_trace(TRACE_PATH)
+            show_message(f"Saved profile to {TRACE_PATH}")
+    else:
+        screen_manager.handle_event(event)  # Handle screen events
+    return True
+
+
+def main():
+    """Run the game loop until the window is closed."""
+    clock = pygame.time.Clock()
+    frame_stats = FrameStats()
+    last_frame_start = time.perf_counter()
+    overlay_font = None
+    timer_set_for = None  # Time the schedule timer was last set for (None: not set)
+    recorder = None
+    if RECORD_PATH:
+        # Start from a known seed, so random picks and spins come out the same when the session is replayed
+        seed = random.randrange(2 ** 32)
+        random.seed(seed)
+        wheel.rng.seed(seed)
+        tracker.storage.close()  # Finish any waiting writes (the examples, on a first run) so the saved copy has them
+        recorder = Recorder(RECORD_PATH, seed, DATABASE_PATH, custom_types={"SCHEDULE": SCHEDULE_EVENT})
+    indexing = True  # Whether index_lists() has items left to index
+    running = True
+    while running:
+        idle = IDLE_WAIT and not screen_manager.is_animating() and importing is None and not indexing
+        if idle:
+            # Nothing is moving, so sleep until an event arrives (or the caret needs to blink)
+            event = pygame.event.wait(IDLE_TIMEOUT)
+            events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+        else:
+            events = pygame.event.get()
+
+        frame_start = frame_stats.start_frame()
+        dt = frame_start - last_frame_start  # Seconds since the last frame, for anything animating
+        last_frame_start = frame_start
+        if recorder is not None:
+            recorder.frame(dt, get_ticks(), events)
+        for event in events:
+            if not handle_event(event):
+                running = False
+            if event.type == SCHEDULE_EVENT:
+                timer_set_for = -1  # Set the timer again even if the next event has not changed
+        run_import()
+        indexing = index_lists()
+
+        next_time = tracker.next_event_time()  # Top of the scheduler's heap, no task is looked at
+        if next_time != timer_set_for:
+            arm_schedule_timer(next_time)
+            timer_set_for = next_time
+
+        if profiler.enabled:
+            screen_manager.request_full_redraw()  # The overlay covers the bottom of the screen, so redraw under it
+        dirty_rects = screen_manager.draw(screen, dt)
+        if profiler.enabled:
+            overlay_font = overlay_font or pygame.font.SysFont('monospace', 13)
+            profiler.draw_overlay(screen, overlay_font)
+
+        if dirty_rects is None:
+            pygame.display.flip()  # The whole screen was drawn
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)  # Only push the parts that changed
+        frame_stats.end_frame(frame_start, idle)
+        profiler.record_frame(frame_start, time.perf_counter())
+
+        if not idle:
+            clock.tick(FPS)  # Frame rate limit while animating
+
+    if profiler.enabled or os.environ.get('TASKTRACKER_PROFILE'):
+        # Only when profiling, the app itself has nothing to say on the console
+        stats = frame_stats.summary()
+        print(f"{stats['frames']} frames ({stats['idle_frames']} idle), "
+              f"avg work {stats['avg_work_ms']:.2f} ms, avg frame {stats['avg_frame_ms']:.2f} ms, busy {stats['busy']:.1%}")
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded session to {RECORD_PATH}")
+    tracker.close()  # Finish saving before exiting
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Append-only log of completed tasks, bingo wins and redeemed rewards, with daily and weekly totals kept up to date.
+
+Each event is 9 bytes in the log. The log is never read whole: the totals are
+saved in a small JSON file next to it, along with how much of the log they
+cover, so opening only reads the events added since (say, by the command line
+while the app was not running). Catching up goes through the log with mmap, a
+chunk at a time.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timedelta
+
+
+TASK_DONE, TASK_REOPENED, REWARD_REDEEMED, REWARD_RETURNED, BINGO = range(5)
+EVENT_NAMES = ("task done", "task reopened", "reward redeemed", "reward returned", "bingo")
+RECORD = struct.Struct("<IIB")  # Unix time, item id (0 for a bingo), event
+CHUNK_RECORDS = 4096  # Events unpacked at a time when going through the log
+
+
+def day_key(when):
+    return datetime.fromtimestamp(when).strftime("%Y-%m-%d")
+
+
+def week_key(when):
+    year, week, _ = datetime.fromtimestamp(when).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def new_counts():
+    return [0] * len(EVENT_NAMES)
+
+
+class History:
+    """The event log of one database, with its totals per day, per week and of all time."""
+    def __init__(self, path):
+        self.path = path
+        self.totals_path = path + ".totals.json"
+        self.daily = {}  # "YYYY-MM-DD" -> count of each event that day
+        self.weekly = {}  # "YYYY-Www" (ISO week) -> count of each event that week
+        self.all_time = new_counts()
+        self.covered = 0  # Bytes of the log counted in the totals
+        self.totals_saved = True  # Whether the totals file is up to date
+        self.file = None  # The log, opened for appending on the first event
+        self.load_totals()
+        self.catch_up()
+
+    def load_totals(self):
+        try:
+            with open(self.totals_path, encoding="utf-8") as totals_file:
+                saved = json.load(totals_file)
+            daily, weekly, all_time, covered = saved["daily"], saved["weekly"], saved["all_time"], saved["covered"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return  # None saved yet (or unreadable), count the whole log
+        if covered <= self.log_size():  # Otherwise the log was replaced, so count it again
+            self.daily, self.weekly, self.all_time, self.covered = daily, weekly, all_time, covered
+
+    def log_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def catch_up(self):
+        """Count the events logged since the totals were saved."""
+        size = self.log_size()
+        if size % RECORD.size:
+            # The last event was only partly written (the app was killed), drop it so later ones line up
+            size -= size % RECORD.size
+            os.truncate(self.path, size)
+        if self.covered >= size:
+            return
+        for when, item_id, event in self.read(self.covered // RECORD.size, size // RECORD.size):
+            self.count(when, event)
+        self.covered = size
+        self.totals_saved = False
+
+    def count(self, when, event):
+        for totals, key in ((self.daily, day_key(when)), (self.weekly, week_key(when))):
+            counts = totals.get(key)
+            if counts is None:
+                counts = totals[key] = new_counts()
+            counts[event] += 1
+        self.all_time[event] += 1
+
+    def record(self, event, item_id=None, when=None):
+        """Append an event to the log and add it to the totals."""
+        when = int(time.time() if when is None else when)
+        if self.log_size() != self.covered:
+            self.catch_up()  # Another process (the command line, say) logged something meanwhile
+        if self.file is None:
+            self.file = open(self.path, "ab")
+        self.file.write(RECORD.pack(when, item_id or 0, event))
+        self.file.flush()  # One small write per event, so nothing is lost if the app is killed
+        self.count(when, event)
+        self.covered += RECORD.size
+        self.totals_saved = False
+
+    def read(self, first, last):
+        """Yield (time, item id, event) for events first to last - 1, mapping the log rather than reading it in."""
+        if first >= last:
+            return
+        with open(self.path, "rb") as log_file, mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+            for start in range(first, last, CHUNK_RECORDS):
+                stop = min(start + CHUNK_RECORDS, last)
+                yield from RECORD.iter_unpack(log[start * RECORD.size:stop * RECORD.size])
+
+    def day(self, when=None):
+        """Counts of each event on the day of when (today by default)."""
+        return self.daily.get(day_key(time.time() if when is None else when), new_counts())
+
+    def week(self, when=None):
+        return self.weekly.get(week_key(time.time() if when is None else when), new_counts())
+
+    def last_days(self, days, now=None):
+        """[(date, counts)] for the given number of days up to today, oldest first."""
+        today = datetime.fromtimestamp(time.time() if now is None else now)
+        dates = [today - timedelta(days=back) for back in range(days - 1, -1, -1)]
+        return [(date, self.daily.get(date.strftime("%Y-%m-%d"), new_counts())) for date in dates]
+
+    def best_week(self):
+        """(week, counts) of the week with the most tasks done, or None before the first one."""
+        if not self.weekly:
+            return None
+        return max(self.weekly.items(), key=lambda week: tasks_done(week[1]))
+
+    def save_totals(self):
+        """Write the totals next to the log (through a temporary file, so a crash never leaves half of them)."""
+        if self.totals_saved:
+            return
+        temporary_path = self.totals_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as totals_file:
+            json.dump({"covered": self.covered, "all_time": self.all_time, "daily": self.daily, "weekly": self.weekly},
+                      totals_file, separators=(",", ":"))
+        os.replace(temporary_path, self.totals_path)
+        self.totals_saved = True
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.save_totals()
+
+
+def tasks_done(counts):
+    """Tasks completed, less the ones reopened again."""
+    return max(0, counts[TASK_DONE] - counts[TASK_REOPENED])
+
+
+def rewards_redeemed(counts):
+    return max(0, counts[REWARD_REDEEMED] - counts[REWARD_RETURNED])
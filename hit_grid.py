@@ -0,0 +1,38 @@
+"""Uniform grid over widget rects, to find the widget under the mouse without testing every one."""
+from collections import defaultdict
+
+
+class HitGrid:
+    """Buckets items by the grid cells their rect covers.
+
+    A lookup only tests the few items in the cell under the point. Items added
+    later are treated as being on top (screens add widgets in drawing order).
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)  # (column, row) -> [(item, rect)], in the order added
+
+    def cells_covered(self, rect):
+        size = self.cell_size
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield column, row
+
+    def add(self, item, rect):
+        """Add an item covering rect (anything with left/top/right/bottom and collidepoint)."""
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        for cell in self.cells_covered(rect):
+            self.cells[cell].append((item, rect))
+
+    def at(self, pos):
+        """Return the topmost item whose rect contains pos, or None."""
+        entries = self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if entries:
+            for item, rect in reversed(entries):
+                if rect.collidepoint(pos):
+                    return item
+        return None
+
+    def clear(self):
+        self.cells.clear()
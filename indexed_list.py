@@ -0,0 +1,158 @@
+"""List with fast insert and delete by position, used for very long task and reward lists."""
+from collections.abc import MutableSequence
+
+
+class IndexedList(MutableSequence):
+    """Drop-in replacement for a list that stays fast with 100k+ items.
+
+    Items are kept in blocks of at most 2 * block_size. A Fenwick tree over the
+    block lengths finds the block holding a position in O(log n), so lookup,
+    insert and delete by position are O(log n) plus a bounded move inside one block.
+    """
+    block_size = 256
+
+    def __init__(self, items=()):
+        self.blocks = []  # Lists of items, in order
+        self.tree = [0]  # Fenwick tree of block lengths (1-based)
+        self.length = 0
+        self.extend(items)
+
+    def rebuild(self):
+        """Rebuild the Fenwick tree after blocks were added or removed (O(number of blocks))."""
+        tree = [0] + [len(block) for block in self.blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def add_length(self, block_index, amount):
+        i = block_index + 1
+        while i < len(self.tree):
+            self.tree[i] += amount
+            i += i & -i
+
+    def locate(self, index):
+        """Return (block index, offset in block) for a position in the list."""
+        position = 0
+        remaining = index
+        step = 1 << (len(self.blocks).bit_length() - 1) if self.blocks else 0
+        while step:
+            next_position = position + step
+            if next_position < len(self.tree) and self.tree[next_position] <= remaining:
+                position = next_position
+                remaining -= self.tree[next_position]
+            step >>= 1
+        return position, remaining
+
+    def check_index(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("list index out of range")
+        return index
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self.get_range(start, stop)
+        block_index, offset = self.locate(self.check_index(index))
+        return self.blocks[block_index][offset]
+
+    def get_range(self, start, stop):
+        """Return the items from start up to stop, touching only the blocks that hold them."""
+        items = []
+        if start >= stop:
+            return items
+        block_index, offset = self.locate(start)
+        wanted = stop - start
+        while wanted > 0 and block_index < len(self.blocks):
+            chunk = self.blocks[block_index][offset:offset + wanted]
+            items.extend(chunk)
+            wanted -= len(chunk)
+            block_index += 1
+            offset = 0
+        return items
+
+    def __setitem__(self, index, item):
+        if isinstance(index, slice):
+            raise TypeError("IndexedList does not support slice assignment")
+        block_index, offset = self.locate(self.check_index(index))
+        self.blocks[block_index][offset] = item
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for i in reversed(range(*index.indices(self.length))):
+                del self[i]
+            return
+        block_index, offset = self.locate(self.check_index(index))
+        block = self.blocks[block_index]
+        del block[offset]
+        self.length -= 1
+        if block:
+            self.add_length(block_index, -1)
+        else:
+            del self.blocks[block_index]
+            self.rebuild()
+
+    def insert(self, index, item):
+        if index < 0:
+            index = max(0, index + self.length)
+        index = min(index, self.length)
+        if index == self.length:
+            self.append(item)
+            return
+        block_index, offset = self.locate(index)
+        block = self.blocks[block_index]
+        block.insert(offset, item)
+        self.length += 1
+        if len(block) > 2 * self.block_size:
+            # Split the block so moving items inside it stays cheap
+            self.blocks[block_index:block_index + 1] = [block[:self.block_size], block[self.block_size:]]
+            self.rebuild()
+        else:
+            self.add_length(block_index, 1)
+
+    def append(self, item):
+        if self.blocks and len(self.blocks[-1]) < 2 * self.block_size:
+            self.blocks[-1].append(item)
+            self.add_length(len(self.blocks) - 1, 1)
+        else:
+            self.blocks.append([item])
+            self.rebuild()
+        self.length += 1
+
+    def extend(self, items):
+        items = list(items)
+        if not items:
+            return
+        if self.blocks:
+            items = self.blocks.pop() + items
+        for start in range(0, len(items), self.block_size):
+            self.blocks.append(items[start:start + self.block_size])
+        self.length = sum(len(block) for block in self.blocks)
+        self.rebuild()
+
+    def index(self, item, start=0, stop=None):
+        """Return the position of an item (one pass over the blocks rather than a lookup per position)."""
+        for position, value in enumerate(self):
+            if position >= start and (stop is None or position < stop) and (value is item or value == item):
+                return position
+        raise ValueError(f"{item!r} is not in list")
+
+    def clear(self):
+        self.blocks = []
+        self.tree = [0]
+        self.length = 0
+
+    def __repr__(self):
+        return f"IndexedList({list(self)!r})"
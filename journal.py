@@ -0,0 +1,89 @@
+"""Undo and redo stacks of small changes, kept under a memory cap by forgetting the oldest ones."""
+import sys
+from collections import deque
+
+
+MAX_BYTES = 256 * 1024  # Rough memory the stacks may use before the oldest changes are forgotten
+
+
+def change_size(change):
+    """Rough bytes a change holds on to: the tuple, the values in it and any strings in those."""
+    size = sys.getsizeof(change)
+    for value in change:
+        size += sys.getsizeof(value)
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(part) for part in value)
+            size += sum(sys.getsizeof(inner) for part in value if isinstance(part, tuple) for inner in part)
+    return size
+
+
+class Journal:
+    """Changes that can be undone and redone.
+
+    A change is a tuple saying how to put something back, like ("remove", item,
+    index) after an item was added. apply(change) makes the change and returns
+    the change that reverses it, which goes on the other stack. Only what
+    changed is kept, never a copy of a list.
+    """
+    def __init__(self, apply, max_bytes=MAX_BYTES, on_forget=None):
+        self.apply = apply  # change -> change that reverses it
+        self.max_bytes = max_bytes
+        self.on_forget = on_forget  # Called with each change dropped for good (e.g. to free what it kept)
+        self.undo_stack = deque()  # Oldest on the left
+        self.redo_stack = deque()
+        self.sizes = {}  # id(change) -> bytes it was counted as
+        self.bytes = 0  # Rough memory held by both stacks
+
+    def __len__(self):
+        return len(self.undo_stack) + len(self.redo_stack)
+
+    def push(self, stack, change):
+        size = change_size(change)
+        self.sizes[id(change)] = size
+        self.bytes += size
+        stack.append(change)
+
+    def pop(self, stack, left=False):
+        change = stack.popleft() if left else stack.pop()
+        self.bytes -= self.sizes.pop(id(change))
+        return change
+
+    def record(self, change):
+        """Remember how to undo something that was just done (anything undone before it can no longer be redone)."""
+        while self.redo_stack:
+            self.forget(self.pop(self.redo_stack))
+        self.push(self.undo_stack, change)
+        self.trim()
+
+    def forget(self, change):
+        if self.on_forget is not None:
+            self.on_forget(change)
+
+    def trim(self):
+        """Forget the oldest changes until the stacks fit in max_bytes."""
+        while self.bytes > self.max_bytes and self.undo_stack:
+            self.forget(self.pop(self.undo_stack, left=True))
+        while self.bytes > self.max_bytes and self.redo_stack:
+            self.forget(self.pop(self.redo_stack, left=True))  # The furthest redo is the least likely to be wanted
+
+    def undo(self):
+        """Undo the last change and return the change made (None if there was nothing to undo)."""
+        return self.move(self.undo_stack, self.redo_stack)
+
+    def redo(self):
+        """Redo the last undone change and return the change made (None if there was nothing to redo)."""
+        return self.move(self.redo_stack, self.undo_stack)
+
+    def move(self, source, target):
+        if not source:
+            return None
+        change = self.pop(source)
+        self.push(target, self.apply(change))
+        self.trim()
+        return change
+
+    def clear(self):
+        while self.undo_stack:
+            self.forget(self.pop(self.undo_stack))
+        while self.redo_stack:
+            self.forget(self.pop(self.redo_stack))
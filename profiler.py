@@ -0,0 +1,154 @@
+"""Opt-in timing of every widget and screen draw/handle_event call, with an overlay and Chrome trace export.
+
+Nothing is wrapped until the profiler is enabled, so it costs nothing while it is off.
+"""
+import functools
+import json
+import time
+from collections import defaultdict, deque
+
+import pygame
+
+
+class Profiler:
+    # pygame functions that return a new Surface, counted as surface allocations
+    allocating_functions = [
+        (pygame.transform, "scale"),
+        (pygame.transform, "smoothscale"),
+        (pygame.transform, "rotate"),
+        (pygame.transform, "rotozoom"),
+        (pygame.transform, "flip"),
+        (pygame, "Surface"),
+    ]
+
+    def __init__(self, classes, methods=("draw", "draw_dirty", "handle_event"), allocation_counters=(), max_events=200_000):
+        self.classes = classes  # Widget and screen classes to time
+        self.methods = methods
+        self.allocation_counters = list(allocation_counters)  # Extra callables returning a running allocation count
+        self.enabled = False
+        self.patched = []  # (owner, attribute, original) to put back when disabled
+        self.surfaces_created = 0
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0, 0])  # (label, method) -> [calls, total s, max s, surfaces]
+        self.events = deque(maxlen=max_events)  # Chrome trace events, oldest dropped first
+        self.frames = 0
+        self.start_time = time.perf_counter()
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def enable(self):
+        """Start timing (and clear the numbers from any earlier run)."""
+        if self.enabled:
+            return
+        self.stats.clear()
+        self.events.clear()
+        self.frames = 0
+        self.start_time = time.perf_counter()
+        for cls in self.classes:
+            for method in self.methods:
+                if method in cls.__dict__:  # Inherited methods are wrapped on the class that defines them
+                    self.patch(cls, method, self.timed(cls.__dict__[method]))
+        for owner, name in self.allocating_functions:
+            self.patch(owner, name, self.counted(getattr(owner, name)))
+        self.enabled = True
+
+    def disable(self):
+        """Put every original method back."""
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.patched = []
+        self.enabled = False
+
+    def patch(self, owner, name, replacement):
+        self.patched.append((owner, name, getattr(owner, name) if not isinstance(owner, type) else owner.__dict__[name]))
+        setattr(owner, name, replacement)
+
+    def allocations(self):
+        return self.surfaces_created + sum(counter() for counter in self.allocation_counters)
+
+    def counted(self, function):
+        if isinstance(function, type):
+            profiler = self
+
+            class CountedSurface(function):
+                def __init__(self, *args, **kwargs):
+                    profiler.surfaces_created += 1
+                    super().__init__(*args, **kwargs)
+            return CountedSurface
+
+        @functools.wraps(function)
+        def counted_function(*args, **kwargs):
+            self.surfaces_created += 1
+            return function(*args, **kwargs)
+        return counted_function
+
+    def timed(self, method):
+        method_name = method.__qualname__
+
+        @functools.wraps(method)
+        def timed_method(widget, *args, **kwargs):
+            allocations = self.allocations()
+            start = time.perf_counter()
+            try:
+                return method(widget, *args, **kwargs)
+            finally:
+                self.record(label(widget), method_name, start, time.perf_counter(), self.allocations() - allocations)
+        return timed_method
+
+    def record(self, name, method, start, end, surfaces):
+        stats = self.stats[(name, method)]
+        stats[0] += 1
+        stats[1] += end - start
+        stats[2] = max(stats[2], end - start)
+        stats[3] += surfaces
+        self.events.append({
+            "name": f"{name} {method}", "cat": method.rsplit(".", 1)[-1], "ph": "X", "pid": 1, "tid": 1,
+            "ts": (start - self.start_time) * 1e6, "dur": (end - start) * 1e6, "args": {"surfaces": surfaces},
+        })
+
+    def record_frame(self, start, end):
+        """Record a whole frame of the main loop."""
+        if self.enabled:
+            self.frames += 1
+            self.record("frame", "main loop", start, end, 0)
+
+    def slowest(self, count=8):
+        """Return (label, method, ms per frame, surfaces per frame) for the most expensive calls."""
+        frames = max(1, self.frames)
+        rows = [(name, method.rsplit(".", 1)[-1], 1000 * total / frames, surfaces / frames)
+                for (name, method), (calls, total, longest, surfaces) in self.stats.items() if name != "frame"]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:count]
+
+    def draw_overlay(self, screen, font):
+        """Draw the slowest widgets and screens over the top of the window."""
+        lines = [f"{self.frames} frames   ms/frame   surfaces/frame"]
+        lines += [f"{name[:28]:28} {method:12} {ms:6.3f} {surfaces:5.1f}" for name, method, ms, surfaces in self.slowest()]
+        line_height = font.get_linesize()
+        overlay = pygame.Surface((screen.get_width(), line_height * len(lines) + 6), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            overlay.blit(font.render(line, True, (255, 255, 255)), (4, 3 + i * line_height))
+        screen.blit(overlay, (0, screen.get_height() - overlay.get_height()))
+
+    def export_chrome_trace(self, path):
+        """Write the recorded calls as a Chrome trace (open in chrome://tracing or Perfetto)."""
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, trace_file)
+
+
+def label(widget):
+    """Name a widget or screen for the profile."""
+    name = getattr(widget, "name", None)
+    if name:
+        return name
+    text = getattr(widget, "text", None)
+    if isinstance(text, str) and text:
+        return f"{type(widget).__name__} '{text.replace(chr(10), ' ')}'"
+    rect = getattr(widget, "rect", None)
+    if rect is not None:
+        return f"{type(widget).__name__}@{rect.x},{rect.y}"
+    return type(widget).__name__
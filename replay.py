@@ -0,0 +1,204 @@
+"""Record a session's input and replay it headlessly, timing every frame, to compare builds on real use.
+
+Recording is turned on when the app starts:
+
+    TASKTRACKER_RECORD=session.rec python "design done.py"
+
+The recording keeps the saved tasks as they were at the start, the seed given
+to the random picks and the wheel, and for every frame its dt, the time on the
+app's clock and the events handled in it. Replaying feeds the same events
+through the app's event handling (and so ScreenManager.handle_event) on SDL's
+dummy video driver, with the app's clock set from the recording:
+
+    python replay.py session.rec                           # as fast as possible, report frame times
+    python replay.py session.rec --real-time               # keep to the recorded timing
+    python replay.py session.rec --save-baseline           # record the frame times as the baseline
+    python replay.py session.rec --baseline old.json       # compare with another build's frame times
+
+Due dates and the history log are not replayed: picks weighted by how soon
+tasks are due, reminders and the Stats screen follow the time (and the log) of
+the replay.
+
+Exits with status 1 if the p99 frame time is slower than the baseline by more than the tolerance.
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pygame
+
+VERSION = 1
+EVENT_TYPES = {  # Events worth recording (anything else the app ignores), by name so recordings outlive pygame versions
+    "QUIT": pygame.QUIT,
+    "KEYDOWN": pygame.KEYDOWN,
+    "KEYUP": pygame.KEYUP,
+    "MOUSEBUTTONDOWN": pygame.MOUSEBUTTONDOWN,
+    "MOUSEBUTTONUP": pygame.MOUSEBUTTONUP,
+    "MOUSEMOTION": pygame.MOUSEMOTION,
+    "MOUSEWHEEL": pygame.MOUSEWHEEL,
+    "DROPFILE": pygame.DROPFILE,
+}
+
+
+def encode_event(event, names):
+    """[type name, {attribute: value}] for an event, or None if it is not worth recording."""
+    name = names.get(event.type)
+    if name is None:
+        return None
+    attributes = {}
+    for key, value in event.dict.items():
+        if isinstance(value, tuple):
+            value = list(value)
+        if isinstance(value, (bool, int, float, str, list)):
+            attributes[key] = value  # The window and other objects are left out
+    return [name, attributes] if attributes else [name]
+
+
+def decode_event(encoded, types):
+    attributes = {key: tuple(value) if isinstance(value, list) else value
+                  for key, value in (encoded[1] if len(encoded) > 1 else {}).items()}
+    return pygame.event.Event(types[encoded[0]], **attributes)
+
+
+class Recorder:
+    """Writes a session to a gzipped file, one JSON line per frame."""
+    def __init__(self, path, seed, database_path=None, custom_types=None):
+        self.types = dict(EVENT_TYPES, **(custom_types or {}))  # name -> event type (the app's own ones too)
+        self.names = {event_type: name for name, event_type in self.types.items()}
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.ticks = None  # App clock (ms) at the last frame
+        database = None
+        if database_path is not None and os.path.exists(database_path):
+            with open(database_path, "rb") as database_file:
+                database = base64.b64encode(gzip.compress(database_file.read())).decode("ascii")
+        self.write({"version": VERSION, "seed": seed, "database": database})
+
+    def write(self, line):
+        self.file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def frame(self, dt, ticks, events):
+        """Record a frame: seconds since the last one, the app clock in ms and the events handled."""
+        encoded = [event for event in (encode_event(event, self.names) for event in events) if event is not None]
+        ticks_step = ticks - (self.ticks or 0)  # The first frame carries the clock itself, every later one how far it moved
+        self.ticks = ticks
+        line = [round(dt * 1_000_000), ticks_step]  # dt in microseconds, so it stays an integer
+        if encoded:
+            line.append(encoded)
+        self.write(line)
+
+    def close(self):
+        self.file.close()
+
+
+def load_recording(path):
+    """Return (header, frames) where every frame is (dt, ticks, [encoded events])."""
+    with gzip.open(path, "rt", encoding="utf-8") as recording:
+        header = json.loads(recording.readline())
+        if header.get("version") != VERSION:
+            raise ValueError(f"{path} is a version {header.get('version')} recording, this replays version {VERSION}")
+        frames = []
+        ticks = 0
+        for line in recording:
+            frame = json.loads(line)
+            ticks += frame[1]
+            frames.append((frame[0] / 1_000_000, ticks, frame[2] if len(frame) > 2 else []))
+    return header, frames
+
+
+def replay(app, header, frames, real_time=False):
+    """Play a recording through a loaded app and return the seconds each frame took to handle and draw."""
+    types = dict(EVENT_TYPES, SCHEDULE=app.SCHEDULE_EVENT)
+    random.seed(header["seed"])
+    app.wheel.rng.seed(header["seed"])
+    ticks = 0
+    app.get_ticks = lambda: ticks  # The app's clock reads the recorded time
+    app.screen_manager.request_full_redraw()
+    times = []
+    start = time.perf_counter()
+    elapsed = 0.0  # Recorded time up to this frame
+    for dt, ticks, encoded_events in frames:
+        elapsed += dt
+        if real_time:
+            wait = start + elapsed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        frame_start = time.perf_counter()
+        running = True
+        for encoded in encoded_events:
+            running = app.handle_event(decode_event(encoded, types)) and running
+        app.run_import()  # A dropped file is added a batch per frame, as in the app's loop
+        app.index_lists()
+        dirty_rects = app.screen_manager.draw(app.screen, dt)
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        times.append(time.perf_counter() - frame_start)
+        if not running:
+            break  # The window was closed here
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session and time every frame.")
+    parser.add_argument("recording")
+    parser.add_argument("--real-time", action="store_true", help="wait between frames as long as the recording did")
+    parser.add_argument("--full-redraw", action="store_true", help="turn off the dirty rectangle renderer")
+    parser.add_argument("--baseline", help="frame times saved from another build (default: next to the recording)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p99 slow down, 0.5 = 50%%")
+    parser.add_argument("--slack-ms", type=float, default=0.5, help="allowed p99 slow down in ms on top of the tolerance")
+    args = parser.parse_args()
+    if args.baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}, run with --save-baseline to record one")
+    recording_path = os.path.abspath(args.recording)
+    baseline_path = os.path.abspath(args.baseline or os.path.splitext(args.recording)[0] + "-baseline.json")
+
+    import benchmark  # Loads the app the same way (and reuses its percentiles and comparison)
+    header, frames = load_recording(recording_path)
+    with tempfile.TemporaryDirectory() as data_dir:
+        database_path = os.path.join(data_dir, "replay.db")
+        if header["database"] is not None:
+            with open(database_path, "wb") as database_file:
+                database_file.write(gzip.decompress(base64.b64decode(header["database"])))
+        app = benchmark.load_app(database_path)
+        app.screen_manager.dirty_rect_mode = not args.full_redraw
+        times = replay(app, header, frames, args.real_time)
+        app.tracker.close()
+
+    result = {
+        "frames": len(times),
+        "total_ms": 1000 * sum(times),
+        "p50_ms": 1000 * benchmark.percentile(times, 0.50),
+        "p99_ms": 1000 * benchmark.percentile(times, 0.99),
+        "max_ms": 1000 * max(times),
+    }
+    print(f"{result['frames']} frames, total {result['total_ms']:.1f} ms, "
+          f"p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms, max {result['max_ms']:.3f} ms")
+    results = {os.path.basename(recording_path): result}
+
+    if args.save_baseline:
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}, run with --save-baseline to record one")
+        return 0
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = benchmark.compare(results, baseline, args.tolerance, args.slack_ms)
+    for name, p99, baseline_p99 in regressions:
+        print(f"REGRESSION {name}: p99 {p99:.3f} ms (baseline {baseline_p99:.3f} ms)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
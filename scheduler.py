@@ -0,0 +1,169 @@
+"""Due dates, recurrence rules and a heap of timed events, so the next one is found without scanning every task.
+
+Due dates are written "2026-10-20" (the start of that day) or "2026-10-20T17:30",
+and repeats as daily, weekly, monthly, yearly or every N days/weeks/months
+("3d", "2w", "6m"). In a task's text they go in todo.txt style tokens:
+
+    Pay rent due:2026-11-01 rec:monthly
+"""
+import calendar
+import heapq
+import itertools
+import re
+from datetime import datetime, timedelta
+
+
+REPEAT_ALIASES = {"daily": "1d", "weekly": "1w", "monthly": "1m", "yearly": "12m"}
+REPEAT_RULE = re.compile(r"(\d+)([dwm])")
+DUE_TOKEN = re.compile(r"(?:^|\s)due:(\S+)")
+REPEAT_TOKEN = re.compile(r"(?:^|\s)rec:(\S+)")
+
+
+def parse_due(text):
+    """Turn "YYYY-MM-DD" or "YYYY-MM-DDTHH:MM" (local time) into a timestamp."""
+    for date_format in ("%Y-%m-%d", "%Y-%m-%dT%H:%M"):
+        try:
+            return datetime.strptime(text, date_format).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"due date must look like 2026-10-20 or 2026-10-20T17:30, not {text!r}")
+
+
+def format_due(due):
+    when = datetime.fromtimestamp(due)
+    return when.strftime("%Y-%m-%d" if (when.hour, when.minute) == (0, 0) else "%Y-%m-%dT%H:%M")
+
+
+def due_label(due):
+    """Short due date for showing next to a task, like "Oct 20" or "Oct 20 17:30"."""
+    when = datetime.fromtimestamp(due)
+    return when.strftime("%b %d" if (when.hour, when.minute) == (0, 0) else "%b %d %H:%M")
+
+
+def parse_repeat(text):
+    """Check a repeat rule and return it in lower case."""
+    rule = text.strip().lower()
+    match = REPEAT_RULE.fullmatch(REPEAT_ALIASES.get(rule, rule))
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"repeat must be daily, weekly, monthly, yearly or like 3d, 2w or 6m, not {text!r}")
+    return rule
+
+
+def add_months(when, months):
+    month = when.month - 1 + months
+    year, month = when.year + month // 12, month % 12 + 1
+    return when.replace(year=year, month=month, day=min(when.day, calendar.monthrange(year, month)[1]))
+
+
+def next_due(due, repeat, now):
+    """Move a due date on by its repeat rule until it is after now (at least once).
+
+    Days are added on the calendar, so a task due at 9:00 stays at 9:00 across clock changes.
+    """
+    count, unit = REPEAT_RULE.fullmatch(REPEAT_ALIASES.get(repeat, repeat)).groups()
+    start = datetime.fromtimestamp(due)
+    steps = 1
+    while True:
+        if unit == "m":
+            when = add_months(start, int(count) * steps)  # From the original date, so the 31st is not lost after February
+        else:
+            when = start + timedelta(days=int(count) * steps * (7 if unit == "w" else 1))
+        if when.timestamp() > now:
+            return when.timestamp()
+        steps += 1
+
+
+def parse_schedule(text):
+    """Split due: and rec: tokens out of a task's text and return (text, due, repeat).
+
+    Tokens that do not parse are left in the text.
+    """
+    due = repeat = None
+    match = DUE_TOKEN.search(text)
+    if match:
+        try:
+            due = parse_due(match.group(1))
+            text = text[:match.start()] + text[match.end():]
+        except ValueError:
+            pass
+    match = REPEAT_TOKEN.search(text)
+    if match:
+        try:
+            repeat = parse_repeat(match.group(1))
+            text = text[:match.start()] + text[match.end():]
+        except ValueError:
+            pass
+    return text.strip(), due, repeat
+
+
+def schedule_tokens(due, repeat):
+    """The due: and rec: tokens to put after a task's text (empty if it has neither)."""
+    tokens = ""
+    if due is not None:
+        tokens += f" due:{format_due(due)}"
+    if repeat:
+        tokens += f" rec:{repeat}"
+    return tokens
+
+
+class Scheduler:
+    """Timed events for items, kept in a heap ordered by time.
+
+    Rescheduling or cancelling only marks the old heap entry as dead (it is
+    dropped when it reaches the top), so every change is O(log n) and finding
+    the next event is O(1).
+    """
+    def __init__(self):
+        self.heap = []  # [time, order, item, event], item is None once cancelled
+        self.entries = {}  # item -> {event: heap entry}
+        self.order = itertools.count()  # Breaks ties in time, items themselves are not compared
+        self.live = 0  # Entries in the heap that have not been cancelled
+
+    def __len__(self):
+        return self.live
+
+    def schedule(self, item, event, when):
+        """Have event happen to item at when (replacing the same event if it was already scheduled)."""
+        self.cancel(item, event)
+        entry = [when, next(self.order), item, event]
+        self.entries.setdefault(item, {})[event] = entry
+        heapq.heappush(self.heap, entry)
+        self.live += 1
+        if len(self.heap) > 2 * self.live + 64:
+            # Mostly dead entries from rescheduling, rebuild the heap from the live ones
+            self.heap = [entry for entry in self.heap if entry[2] is not None]
+            heapq.heapify(self.heap)
+
+    def cancel(self, item, event=None):
+        """Cancel one of an item's events, or all of them."""
+        events = self.entries.get(item)
+        if not events:
+            return
+        for name in ([event] if event is not None else list(events)):
+            entry = events.pop(name, None)
+            if entry is not None:
+                entry[2] = None
+                self.live -= 1
+        if not events:
+            del self.entries[item]
+
+    def next_time(self):
+        """When the next event happens, or None if nothing is scheduled."""
+        while self.heap and self.heap[0][2] is None:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now):
+        """Remove and return (item, event) for every event up to now, earliest first."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            when, order, item, event = heapq.heappop(self.heap)
+            if item is not None:
+                self.cancel(item, event)  # Forget the entry (already off the heap)
+                due.append((item, event))
+        return due
+
+    def clear(self):
+        self.heap.clear()
+        self.entries.clear()
+        self.live = 0
@@ -0,0 +1,158 @@
+"""Word-prefix index over task and reward text, used to filter lists as you type."""
+import re
+from collections import defaultdict
+
+
+def words_in(text):
+    return text.lower().split()
+
+
+class SearchIndex:
+    """Maps every word prefix of an item's text to the items containing it.
+
+    Adding, editing and removing an item only touches that item's words, and a
+    search intersects the sets for the typed words instead of scanning the list.
+
+    With background=True the items are only given their places at first, and
+    their words are indexed build_step at a time by index_some() (a chunk per
+    frame). Until then searches also check the items not indexed yet one by one.
+    """
+    max_prefix = 12  # Longer prefixes are not stored, matches for them are checked word by word
+    build_step = 250  # Items index_some() indexes at a time, a few ms of work
+
+    def __init__(self, items=(), background=False):
+        self.prefixes = defaultdict(set)  # prefix -> items with a word starting with it
+        self.words = {}  # item -> words it was indexed under (None until split), kept in list order
+        self.order = {}  # item -> number given when it was added, to sort matches into list order
+        self.added = 0
+        self.in_order = True  # Whether self.words is in list order (an item put back in the middle breaks it)
+        self.pending = []  # Items given at the start whose words index_some() has not indexed yet
+        self.next_pending = 0  # Position in self.pending of the next one to index
+        if background:
+            self.pending = list(items)
+            self.words = dict.fromkeys(self.pending)
+            self.order = {item: number for number, item in enumerate(self.pending)}
+            self.added = len(self.pending)
+        else:
+            for item in items:
+                self.add(item)
+
+    def index_some(self):
+        """Index the words of the next build_step items given at the start; returns whether any are left."""
+        stop = min(len(self.pending), self.next_pending + self.build_step)
+        for item in self.pending[self.next_pending:stop]:
+            if item in self.words:  # Not removed meanwhile (indexing one again changes nothing)
+                self.index_words(item, self.words_of(item))
+        self.next_pending = stop
+        if stop == len(self.pending):
+            self.pending = []
+            self.next_pending = 0
+        return bool(self.pending)
+
+    def words_of(self, item):
+        words = self.words[item]
+        if words is None:
+            words = self.words[item] = words_in(item.text)
+        return words
+
+    def index_words(self, item, words):
+        for word in words:
+            for length in range(1, min(len(word), self.max_prefix) + 1):
+                self.prefixes[word[:length]].add(item)
+
+    def unindex_words(self, item, words):
+        for word in words:
+            for length in range(1, min(len(word), self.max_prefix) + 1):
+                prefix = word[:length]
+                items = self.prefixes.get(prefix)
+                if items is not None:
+                    items.discard(item)
+                    if not items:
+                        del self.prefixes[prefix]
+
+    def add(self, item):
+        """Index a new item (at the end of the list)."""
+        words = words_in(item.text)
+        self.words[item] = words
+        self.order[item] = self.added
+        self.added += 1
+        self.index_words(item, words)
+
+    def insert(self, item, previous=None, following=None):
+        """Index an item put back between two others in the list (None at either end), keeping its place in list order."""
+        if following not in self.order:
+            self.add(item)  # At the end after all
+            return
+        low = self.order[previous] if previous in self.order else -1
+        self.order[item] = (low + self.order[following]) / 2  # Sorts between its neighbours
+        words = words_in(item.text)
+        self.words[item] = words
+        self.index_words(item, words)
+        self.in_order = False
+
+    def items_in_order(self):
+        """Every indexed item, in list order."""
+        if not self.in_order:
+            self.words = dict(sorted(self.words.items(), key=lambda entry: self.order[entry[0]]))
+            self.in_order = True
+        return self.words
+
+    def update(self, item):
+        """Re-index an item after its text was edited (it keeps its place in the list)."""
+        if item not in self.words:
+            self.add(item)
+            return
+        if self.words[item] is not None:
+            self.unindex_words(item, self.words[item])
+        words = words_in(item.text)
+        self.words[item] = words
+        self.index_words(item, words)
+
+    def remove(self, item):
+        """Take an item out of the index."""
+        if item in self.words:
+            words = self.words.pop(item)
+            del self.order[item]
+            if words is not None:
+                self.unindex_words(item, words)
+
+    def search(self, text, complete=None):
+        """Return the items, in list order, with a word starting with each typed word.
+
+        If complete is True or False only items with that completion status are returned.
+        """
+        query = words_in(text)
+        if not query:
+            matches = list(self.items_in_order())
+        else:
+            pending = self.pending[self.next_pending:]
+            candidate_sets = []
+            for word in query:
+                items = self.prefixes.get(word[:self.max_prefix])
+                if not items and not pending:
+                    return []
+                candidate_sets.append(items or set())
+            candidate_sets.sort(key=len)  # Intersect starting from the smallest set
+            candidates = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+            if pending:
+                # Not indexed yet, so check the text of the items left (one regex is quicker than splitting it into words)
+                pattern = re.compile("".join(rf"(?=.*(?<!\S){re.escape(word)})" for word in query), re.DOTALL)
+                candidates.update(item for item in pending if item in self.words and pattern.match(item.text.lower()))
+
+            long_words = [word for word in query if len(word) > self.max_prefix]
+            if long_words:
+                candidates = {item for item in candidates if self.has_words(item, long_words)}
+
+            if len(candidates) * 4 > len(self.words):
+                matches = [item for item in self.items_in_order() if item in candidates]  # Cheaper than sorting most of the list
+            else:
+                matches = sorted(candidates, key=self.order.__getitem__)
+
+        if complete is not None:
+            matches = [item for item in matches if item.complete == complete]
+        return matches
+
+    def has_words(self, item, query):
+        """Whether the item has a word starting with each word of the query."""
+        words = self.words_of(item)
+        return all(any(w.startswith(word) for w in words) for word in query)
@@ -0,0 +1,239 @@
+"""SQLite storage for tasks, rewards and bingo marks, written from a background thread."""
+import os
+import queue
+import sqlite3
+import sys
+import threading
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,              -- "task" or "reward"
+    text TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    bingo_marked INTEGER NOT NULL DEFAULT 0,
+    position INTEGER NOT NULL,       -- Order of the item in its list
+    weight REAL NOT NULL DEFAULT 1,  -- How likely the item is to be picked at random
+    due REAL,                        -- When a task is due (Unix time), NULL if it has no due date
+    repeat TEXT,                     -- How often a task comes round again (see scheduler.py), NULL if never
+    deleted INTEGER NOT NULL DEFAULT 0  -- Removed, but kept (in its place) while the removal can still be undone
+)
+'''
+NEW_COLUMNS = {  # Columns added since the first version, with their definitions
+    "weight": "REAL NOT NULL DEFAULT 1",
+    "due": "REAL",
+    "repeat": "TEXT",
+    "deleted": "INTEGER NOT NULL DEFAULT 0",
+}
+INSERT = ("INSERT INTO items (id, kind, text, position, complete, bingo_marked, weight, due, repeat) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+COLUMNS = "id, text, complete, bingo_marked, weight, due, repeat"  # What load, iterate and get return
+
+
+def create_schema(connection):
+    """Create the items table, or add the columns newer versions use to an older one."""
+    connection.execute(SCHEMA)
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(items)")}
+    for name, definition in NEW_COLUMNS.items():
+        if name not in columns:
+            try:
+                connection.execute(f"ALTER TABLE items ADD COLUMN {name} {definition}")
+            except sqlite3.OperationalError:
+                pass  # Added by another connection in the meantime
+
+
+def row_values(row):
+    """Turn a saved row into (id, text, complete, bingo_marked, weight, due, repeat) with real booleans."""
+    item_id, text, complete, bingo_marked, weight, due, repeat = row
+    return item_id, text, bool(complete), bool(bingo_marked), weight, due, repeat
+
+
+def item_values(item):
+    """The complete, bingo_marked, weight, due and repeat columns of an item (rewards have no bingo mark or due date)."""
+    return (int(item.complete), int(getattr(item, "bingo_marked", False)), item.weight,
+            getattr(item, "due", None), getattr(item, "repeat", None))
+
+
+class Storage:
+    def __init__(self, path):
+        self.path = path
+        self.is_new = not os.path.exists(path)  # Nothing saved yet (first run)
+        self.next_id = 1  # Ids are handed out here so inserts do not have to wait for the database
+        self.next_position = 1
+        self.ids_lock = threading.Lock()  # next_id is moved on by the writer too, when another process took an id
+        self.moved_ids = {}  # id handed out here -> id it was saved under instead (it was already taken)
+        self.writes = queue.Queue(maxsize=100)  # (sql, params, items) waiting to be written, None stops the writer
+                                                # (bounded, so a big import waits for the disk instead of piling up in memory)
+        self.writer = None  # Background thread, started on the first write
+
+    def load_counters(self, connection=None):
+        """Carry on handing out ids and positions after the ones already saved."""
+        own_connection = connection is None
+        if own_connection:
+            connection = sqlite3.connect(self.path)
+        try:
+            create_schema(connection)
+            row = connection.execute("SELECT MAX(id), MAX(position) FROM items").fetchone()
+            self.next_id = max(self.next_id, (row[0] or 0) + 1)
+            self.next_position = max(self.next_position, (row[1] or 0) + 1)
+        finally:
+            if own_connection:
+                connection.close()
+
+    def load(self, kind):
+        """Return (id, text, complete, bingo_marked, weight, due, repeat) for every saved item of a kind, in list order."""
+        connection = sqlite3.connect(self.path)
+        try:
+            self.load_counters(connection)
+            rows = connection.execute(f"SELECT {COLUMNS} FROM items WHERE kind = ? AND NOT deleted ORDER BY position",
+                                      (kind,)).fetchall()
+        finally:
+            connection.close()
+        return [row_values(row) for row in rows]
+
+    def get(self, item_id):
+        """Return the kind and the saved values (as load gives them) of one item, or None if there is none with that id."""
+        connection = sqlite3.connect(self.path)
+        try:
+            create_schema(connection)
+            row = connection.execute(f"SELECT kind, {COLUMNS} FROM items WHERE id = ? AND NOT deleted", (item_id,)).fetchone()
+        finally:
+            connection.close()
+        return None if row is None else (row[0], row_values(row[1:]))
+
+    def insert(self, item):
+        """Save a new item at the end of its list and give it an id."""
+        with self.ids_lock:
+            item.id = self.next_id
+            self.next_id += 1
+        self.write(INSERT, (item.id, item.kind, item.text, self.next_position) + item_values(item), [item])
+        self.next_position += 1
+
+    def insert_many(self, kind, records):
+        """Save a batch of new items (anything with text, complete and weight, and maybe bingo_marked, due and repeat) in one write.
+
+        Records with an id attribute (tasks and rewards) are given their ids. Returns the ids, in order.
+        """
+        with self.ids_lock:
+            ids = range(self.next_id, self.next_id + len(records))
+            self.next_id += len(records)
+        for record, item_id in zip(records, ids):
+            if hasattr(record, "id"):
+                record.id = item_id
+        rows = [(item_id, kind, record.text, position) + item_values(record)
+                for item_id, position, record in zip(ids, range(self.next_position, self.next_position + len(records)), records)]
+        self.next_position += len(records)
+        self.write(INSERT, rows, records)
+        return ids
+
+    def iterate(self, kind, batch_size=1000):
+        """Yield (id, text, complete, bingo_marked, weight, due, repeat) for every saved item of a kind without loading them all at once."""
+        connection = sqlite3.connect(self.path)
+        try:
+            create_schema(connection)
+            cursor = connection.execute(f"SELECT {COLUMNS} FROM items WHERE kind = ? AND NOT deleted ORDER BY position", (kind,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row_values(row)
+        finally:
+            connection.close()
+
+    def update(self, item):
+        """Save the current text, flags, weight and schedule of an item."""
+        if item.id is None:
+            self.insert(item)
+            return
+        self.write("UPDATE items SET text = ?, complete = ?, bingo_marked = ?, weight = ?, due = ?, repeat = ? WHERE id = ?",
+                   (item.text,) + item_values(item) + (item.id,))
+
+    def delete(self, item):
+        """Hide an item, keeping its row (and place in the list) so restore can bring it back."""
+        if item.id is not None:
+            self.write("UPDATE items SET deleted = 1 WHERE id = ?", (item.id,))
+
+    def restore(self, item):
+        """Bring back an item hidden by delete."""
+        if item.id is not None:
+            self.write("UPDATE items SET deleted = 0 WHERE id = ?", (item.id,))
+
+    def purge(self, item):
+        """Remove a deleted item for good (once its removal can no longer be undone)."""
+        if item.id is not None:
+            self.write("DELETE FROM items WHERE id = ? AND deleted", (item.id,))
+            item.id = None
+
+    def write(self, sql, params, items=None):
+        """Queue a write (params is a list of rows to write the same statement for each of them).
+
+        items are the objects an INSERT saves, in the same order as its rows, so their ids can be changed if taken.
+        """
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.run_writer, daemon=True)
+            self.writer.start()
+        self.writes.put((sql, params, items))
+
+    def run_writer(self):
+        """Apply queued writes, committing whenever the queue runs empty.
+
+        A write that fails is reported and skipped, so the queue keeps draining (and the app never waits on it forever).
+        """
+        connection = sqlite3.connect(self.path)
+        create_schema(connection)
+        while True:
+            write = self.writes.get()
+            if write is None:
+                break
+            sql, params, items = write
+            try:
+                if sql == INSERT:
+                    params = self.move_taken_ids(connection, params, items)
+                elif self.moved_ids and isinstance(params, tuple):
+                    params = params[:-1] + (self.moved_ids.get(params[-1], params[-1]),)  # Other writes end in the id
+                if isinstance(params, list):
+                    connection.executemany(sql, params)
+                else:
+                    connection.execute(sql, params)
+                if self.writes.empty():
+                    connection.commit()
+            except sqlite3.Error as error:
+                print(f"Could not save to {self.path}: {error}", file=sys.stderr)
+        try:
+            connection.commit()
+        except sqlite3.Error as error:
+            print(f"Could not save to {self.path}: {error}", file=sys.stderr)
+        connection.close()
+
+    def move_taken_ids(self, connection, params, items):
+        """Give new ids to rows whose ids another process (the command line, say) has used since they were handed out."""
+        rows = params if isinstance(params, list) else [params]
+        if not rows:
+            return params
+        ids = [row[0] for row in rows]
+        taken = {row[0] for row in connection.execute("SELECT id FROM items WHERE id BETWEEN ? AND ?", (min(ids), max(ids)))}
+        if not taken:
+            return params
+        highest = connection.execute("SELECT MAX(id) FROM items").fetchone()[0]
+        moved = []
+        for row, item in zip(rows, items or [None] * len(rows)):
+            if row[0] in taken:
+                with self.ids_lock:
+                    self.next_id = max(self.next_id, highest + 1)
+                    new_id = self.next_id
+                    self.next_id += 1
+                self.moved_ids[row[0]] = new_id
+                if hasattr(item, "id"):
+                    item.id = new_id  # Later writes for the item use the new id
+                row = (new_id,) + row[1:]
+            moved.append(row)
+        return moved if isinstance(params, list) else moved[0]
+
+    def close(self):
+        """Finish any writes still waiting and stop the writer thread."""
+        if self.writer is not None:
+            self.writes.put(None)
+            self.writer.join()
+            self.writer = None
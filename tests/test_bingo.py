@@ -0,0 +1,75 @@
+"""Lines and full cards on a bitmask bingo card."""
+from bingo import BingoCard, line_masks
+
+
+def card_with(n=4, tasks=None):
+    """A card with the first tasks squares filled (all of them by default)."""
+    card = BingoCard(n)
+    for square in range(n * n):
+        card.set_empty(square, tasks is not None and square >= tasks)
+    return card
+
+
+def mark_all(card, squares):
+    wins = []
+    for square in squares:
+        wins.extend(card.mark(square))
+    return wins
+
+
+def test_line_masks():
+    assert len(line_masks(4)) == 10  # 4 rows, 4 columns, 2 diagonals
+    assert len(line_masks(1)) == 1
+
+
+def test_rows_columns_and_diagonals_win_once():
+    for squares in ([4, 5, 6, 7], [1, 5, 9, 13], [0, 5, 10, 15], [3, 6, 9, 12]):
+        card = card_with()
+        assert mark_all(card, squares[:-1]) == []
+        line = sum(1 << square for square in squares)
+        assert card.mark(squares[-1]) == (line,)
+        assert card.complete_lines() == [line]
+        card.mark(squares[0], False)
+        assert card.mark(squares[0]) == ()  # Already won
+
+
+def test_square_on_two_lines_wins_both():
+    card = card_with()
+    mark_all(card, [0, 1, 2, 4, 8, 12])
+    assert len(card.mark(3)) == 1  # Row 0
+    card = card_with()
+    mark_all(card, [1, 2, 3, 4, 8, 12])
+    assert len(card.mark(0)) == 2  # Row 0 and column 0
+
+
+def test_empty_squares_never_complete_a_line():
+    card = card_with(tasks=5)
+    for square in range(5, 16):
+        card.mark(square)  # Empty squares are drawn marked
+    assert card.mark(1) == ()  # Column 1 runs through empty squares
+    assert card.complete_lines() == []
+
+
+def test_full_card_wins_when_every_task_is_marked():
+    card = card_with(tasks=3)  # Too few for any line
+    assert mark_all(card, [0, 1]) == []
+    assert not card.is_full()
+    assert card.mark(2) == (0b111,)
+    assert card.is_full()
+    card.mark(2, False)
+    assert card.mark(2) == ()
+
+
+def test_full_card_of_a_whole_board():
+    card = card_with()
+    wins = mark_all(card, range(16))
+    assert len(wins) == 11  # Every line, then the full card
+    assert card.is_full()
+
+
+def test_new_task_in_a_square_can_win_again():
+    card = card_with(tasks=4)  # Exactly row 0
+    assert len(mark_all(card, range(4))) == 1
+    card.set_empty(2, False)  # Square 2 now shows a different task
+    card.mark(2, False)
+    assert card.mark(2) == (0b1111,)
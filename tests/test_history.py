@@ -0,0 +1,118 @@
+"""The event log and the totals saved next to it."""
+import json
+import os
+from datetime import datetime
+
+import history
+from history import BINGO, RECORD, TASK_DONE, TASK_REOPENED, History
+
+MONDAY = datetime(2026, 3, 2, 12).timestamp()
+DAY = 24 * 60 * 60
+
+
+def test_totals_count_days_and_weeks(tmp_path):
+    log = History(str(tmp_path / "history.log"))
+    log.record(TASK_DONE, 1, MONDAY)
+    log.record(TASK_DONE, 2, MONDAY + DAY)
+    log.record(TASK_REOPENED, 2, MONDAY + DAY)
+    log.record(BINGO, when=MONDAY + 7 * DAY)
+    assert log.day(MONDAY)[TASK_DONE] == 1
+    assert log.week(MONDAY + 6 * DAY)[TASK_DONE] == 2
+    assert history.tasks_done(log.week(MONDAY)) == 1
+    assert log.week(MONDAY + 7 * DAY)[BINGO] == 1
+    assert log.all_time[TASK_DONE] == 2
+    assert log.best_week() == ("2026-W10", log.week(MONDAY))
+    log.close()
+
+
+def test_reopening_catches_up_from_the_log(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = History(path)
+    log.record(TASK_DONE, 1, MONDAY)
+    log.close()
+    with open(path, "ab") as log_file:  # Logged by another process after the totals were saved
+        log_file.write(RECORD.pack(int(MONDAY), 2, TASK_DONE))
+        log_file.write(RECORD.pack(int(MONDAY + DAY), 3, TASK_DONE))
+    log = History(path)
+    assert log.day(MONDAY)[TASK_DONE] == 2
+    assert log.all_time[TASK_DONE] == 3
+    assert log.covered == 3 * RECORD.size
+    assert not log.totals_saved
+    log.close()
+    with open(path + ".totals.json", encoding="utf-8") as totals_file:
+        assert json.load(totals_file)["covered"] == 3 * RECORD.size
+
+
+def test_record_catches_up_first(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = History(path)
+    with open(path, "ab") as log_file:
+        log_file.write(RECORD.pack(int(MONDAY), 2, TASK_DONE))
+    log.record(TASK_DONE, 1, MONDAY)
+    assert log.day(MONDAY)[TASK_DONE] == 2
+    assert log.covered == os.path.getsize(path)
+    log.close()
+
+
+def test_torn_trailing_record_is_dropped(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = History(path)
+    log.record(TASK_DONE, 1, MONDAY)
+    log.close()
+    with open(path, "ab") as log_file:  # The app was killed half way through an event
+        log_file.write(RECORD.pack(int(MONDAY), 2, TASK_DONE)[:4])
+    log = History(path)
+    assert os.path.getsize(path) == RECORD.size
+    assert log.all_time[TASK_DONE] == 1
+    log.record(TASK_DONE, 3, MONDAY + DAY)  # Lines up after the dropped bytes
+    log.close()
+    os.remove(path + ".totals.json")  # Count the whole log again
+    log = History(path)
+    assert log.day(MONDAY + DAY)[TASK_DONE] == 1
+    assert log.all_time[TASK_DONE] == 2
+    log.close()
+
+
+def test_totals_are_recomputed_when_missing_or_unreadable(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = History(path)
+    for item_id in range(1, 6):
+        log.record(TASK_DONE, item_id, MONDAY + item_id * DAY)
+    log.close()
+    expected = (log.daily, log.weekly, log.all_time)
+    for broken in (None, "{not json", json.dumps({"daily": {}})):
+        if broken is None:
+            os.remove(path + ".totals.json")
+        else:
+            with open(path + ".totals.json", "w", encoding="utf-8") as totals_file:
+                totals_file.write(broken)
+        log = History(path)
+        assert (log.daily, log.weekly, log.all_time) == expected
+        log.close()
+
+
+def test_totals_covering_more_than_the_log_are_ignored(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = History(path)
+    log.record(TASK_DONE, 1, MONDAY)
+    log.record(TASK_DONE, 2, MONDAY)
+    log.close()
+    with open(path, "wb") as log_file:  # The log was replaced with a shorter one
+        log_file.write(RECORD.pack(int(MONDAY + DAY), 3, TASK_DONE))
+    log = History(path)
+    assert log.all_time[TASK_DONE] == 1
+    assert log.day(MONDAY)[TASK_DONE] == 0
+    assert log.day(MONDAY + DAY)[TASK_DONE] == 1
+    log.close()
+
+
+def test_catch_up_reads_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "CHUNK_RECORDS", 3)
+    path = str(tmp_path / "history.log")
+    with open(path, "wb") as log_file:
+        for item_id in range(10):
+            log_file.write(RECORD.pack(int(MONDAY + item_id * DAY), item_id, TASK_DONE))
+    log = History(path)
+    assert log.all_time[TASK_DONE] == 10
+    assert [counts[TASK_DONE] for _, counts in log.last_days(10, MONDAY + 9 * DAY)] == [1] * 10
+    log.close()
@@ -0,0 +1,95 @@
+"""IndexedList against a plain list, with random edits."""
+import random
+
+import pytest
+
+from indexed_list import IndexedList
+
+
+def small_blocks(items=()):
+    """An IndexedList with tiny blocks, so a few dozen edits split and empty blocks."""
+    indexed = IndexedList()
+    indexed.block_size = 4
+    indexed.extend(items)
+    return indexed
+
+
+def check(indexed, expected):
+    assert len(indexed) == len(expected)
+    assert list(indexed) == expected
+    assert [indexed[i] for i in range(len(expected))] == expected
+    assert [indexed[-i] for i in range(1, len(expected) + 1)] == [expected[-i] for i in range(1, len(expected) + 1)]
+    # Every prefix sum in the Fenwick tree adds up to the blocks it covers
+    for block_index in range(len(indexed.blocks)):
+        before = sum(len(block) for block in indexed.blocks[:block_index])
+        assert indexed.locate(before) == (block_index, 0)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_edits_match_a_list(seed):
+    rng = random.Random(seed)
+    expected = list(range(rng.randrange(30)))
+    indexed = small_blocks(expected)
+    next_item = len(expected)
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.35 or not expected:
+            position = rng.randint(-len(expected) - 2, len(expected) + 2)
+            indexed.insert(position, next_item)
+            expected.insert(position, next_item)
+            next_item += 1
+        elif action < 0.45:
+            indexed.append(next_item)
+            expected.append(next_item)
+            next_item += 1
+        elif action < 0.75:
+            position = rng.randrange(-len(expected), len(expected))
+            del indexed[position]
+            del expected[position]
+        elif action < 0.85:
+            position = rng.randrange(len(expected))
+            indexed[position] = next_item
+            expected[position] = next_item
+            next_item += 1
+        elif action < 0.95:
+            item = rng.choice(expected)
+            assert indexed.index(item) == expected.index(item)
+        else:
+            more = list(range(next_item, next_item + rng.randrange(10)))
+            next_item += len(more)
+            indexed.extend(more)
+            expected.extend(more)
+        check(indexed, expected)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_slices_match_a_list(seed):
+    rng = random.Random(seed)
+    expected = list(range(rng.randrange(1, 60)))
+    indexed = small_blocks(expected)
+    for _ in range(50):
+        start = rng.randint(-len(expected) - 2, len(expected) + 2)
+        stop = rng.randint(-len(expected) - 2, len(expected) + 2)
+        step = rng.choice([None, 1, 2, 3, -1, -2])
+        assert indexed[start:stop:step] == expected[start:stop:step]
+    start = rng.randrange(len(expected))
+    del indexed[start:start + 5]
+    del expected[start:start + 5]
+    check(indexed, expected)
+
+
+def test_errors_match_a_list():
+    indexed = small_blocks(range(10))
+    with pytest.raises(IndexError):
+        indexed[10]
+    with pytest.raises(IndexError):
+        del indexed[-11]
+    with pytest.raises(ValueError):
+        indexed.index(10)
+    assert indexed.index(5, 3, 8) == 5
+    with pytest.raises(ValueError):
+        indexed.index(5, 6)
+    indexed.clear()
+    check(indexed, [])
+    indexed.insert(3, "only")
+    check(indexed, ["only"])
@@ -0,0 +1,91 @@
+"""Undo and redo stacks under a memory cap."""
+from journal import Journal, change_size
+
+
+class Box:
+    def __init__(self):
+        self.value = 0
+
+
+def set_value(change):
+    """("set", box, value) sets the value and returns the change that puts the old one back."""
+    _, box, value = change
+    undo = ("set", box, box.value)
+    box.value = value
+    return undo
+
+
+def make_journal(max_bytes=10_000):
+    forgotten = []
+    return Journal(set_value, max_bytes, on_forget=forgotten.append), forgotten
+
+
+def change_value(journal, box, value):
+    journal.record(("set", box, box.value))
+    box.value = value
+
+
+def test_undo_and_redo_round_trip():
+    journal, forgotten = make_journal()
+    box = Box()
+    for value in (1, 2, 3):
+        change_value(journal, box, value)
+    journal.undo()
+    journal.undo()
+    assert box.value == 1
+    journal.redo()
+    assert box.value == 2
+    journal.redo()
+    assert box.value == 3
+    assert journal.redo() is None
+    for _ in range(3):
+        journal.undo()
+    assert box.value == 0
+    assert journal.undo() is None
+    assert not forgotten
+
+
+def test_a_new_change_clears_redo():
+    journal, forgotten = make_journal()
+    box = Box()
+    change_value(journal, box, 1)
+    change_value(journal, box, 2)
+    journal.undo()
+    change_value(journal, box, 5)
+    assert not journal.redo_stack
+    assert len(forgotten) == 1  # The undone change can never be redone
+    assert journal.redo() is None
+    journal.undo()
+    assert box.value == 1
+
+
+def test_oldest_changes_are_forgotten_over_the_cap():
+    box = Box()
+    size = change_size(("set", box, 0))
+    journal, forgotten = make_journal(max_bytes=size * 5)
+    for value in range(1, 21):
+        change_value(journal, box, value)
+    assert len(journal.undo_stack) == 5
+    assert len(forgotten) == 15
+    assert [change[2] for change in forgotten] == list(range(15))  # Oldest first
+    assert journal.bytes <= journal.max_bytes
+    for _ in range(5):
+        journal.undo()
+    assert box.value == 15  # As far back as the kept changes go
+    assert journal.undo() is None
+
+
+def test_sizes_shrink_back_after_eviction_and_clear():
+    box = Box()
+    journal, forgotten = make_journal(max_bytes=change_size(("set", box, 0)) * 3)
+    for value in range(100):
+        change_value(journal, box, value)
+        if value % 3 == 0:
+            journal.undo()
+            journal.redo()
+    assert len(journal.sizes) == len(journal)
+    assert journal.bytes == sum(journal.sizes.values())
+    journal.clear()
+    assert journal.sizes == {}
+    assert journal.bytes == 0
+    assert len(journal) == 0
@@ -0,0 +1,69 @@
+"""Due dates, repeat rules and the scheduler's heap."""
+from datetime import datetime
+
+import pytest
+
+from scheduler import Scheduler, add_months, next_due, parse_repeat, parse_schedule
+
+
+def stamp(*date):
+    return datetime(*date).timestamp()
+
+
+def test_monthly_repeats_clamp_to_the_end_of_the_month():
+    assert add_months(datetime(2026, 1, 31), 1) == datetime(2026, 2, 28)
+    assert add_months(datetime(2028, 1, 31), 1) == datetime(2028, 2, 29)  # Leap year
+    assert add_months(datetime(2026, 11, 30), 3) == datetime(2027, 2, 28)
+    due = stamp(2026, 1, 31, 9, 0)
+    assert next_due(due, "monthly", due) == stamp(2026, 2, 28, 9, 0)
+    # Counted from the original date, so March gets its 31st back
+    assert next_due(due, "monthly", stamp(2026, 3, 1)) == stamp(2026, 3, 31, 9, 0)
+
+
+def test_next_due_skips_to_after_now():
+    due = stamp(2026, 10, 1)
+    assert next_due(due, "weekly", due) == stamp(2026, 10, 8)
+    assert next_due(due, "3d", stamp(2026, 10, 9, 12)) == stamp(2026, 10, 10)
+    assert next_due(due, "yearly", due) == stamp(2027, 10, 1)
+
+
+def test_parse_repeat_and_schedule_tokens():
+    assert parse_repeat(" Weekly ") == "weekly"
+    with pytest.raises(ValueError):
+        parse_repeat("0d")
+    assert parse_schedule("Pay rent due:2026-11-01 rec:monthly") == ("Pay rent", stamp(2026, 11, 1), "monthly")
+    assert parse_schedule("Odd due:tomorrow") == ("Odd due:tomorrow", None, None)
+
+
+def test_events_come_out_in_time_order():
+    scheduler = Scheduler()
+    for when, item in ((30, "c"), (10, "a"), (20, "b")):
+        scheduler.schedule(item, "due", when)
+    assert scheduler.next_time() == 10
+    assert scheduler.pop_due(20) == [("a", "due"), ("b", "due")]
+    assert len(scheduler) == 1
+    assert scheduler.pop_due(100) == [("c", "due")]
+    assert scheduler.next_time() is None
+
+
+def test_cancelled_and_rescheduled_events_are_skipped():
+    scheduler = Scheduler()
+    scheduler.schedule("a", "soon", 5)
+    scheduler.schedule("a", "due", 10)
+    scheduler.schedule("b", "due", 1)
+    scheduler.cancel("b")
+    scheduler.schedule("a", "due", 50)  # Replaces the one at 10
+    assert len(scheduler) == 2
+    assert scheduler.next_time() == 5
+    assert scheduler.pop_due(20) == [("a", "soon")]
+    assert scheduler.pop_due(60) == [("a", "due")]
+    assert not scheduler.entries
+
+
+def test_heap_is_compacted_after_many_reschedules():
+    scheduler = Scheduler()
+    for when in range(1000):
+        scheduler.schedule("a", "due", when)
+    assert len(scheduler) == 1
+    assert len(scheduler.heap) <= 2 * 1 + 64 + 1
+    assert scheduler.pop_due(1000) == [("a", "due")]
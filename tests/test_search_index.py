@@ -0,0 +1,45 @@
+"""Filtering with the word prefix index."""
+from search_index import SearchIndex
+from tracker import Task
+
+
+def test_item_put_back_keeps_its_place():
+    items = [Task(f"task {name}") for name in "abcdefghij"]
+    index = SearchIndex(items)
+    index.remove(items[2])
+    index.insert(items[2], items[1], items[3])
+    index.remove(items[0])
+    index.insert(items[0], None, items[1])
+    assert index.search("") == items
+    assert index.search("task") == items  # Most of the list matches
+    assert index.search("c") == [items[2]]
+    index.add(Task("task k"))
+    assert [item.text for item in index.search("task")][-2:] == ["task j", "task k"]
+
+
+def test_background_index_finds_the_same_items_while_it_is_built():
+    items = [Task(f"task {name} item{number}") for number, name in enumerate("abcdefghij" * 60)]
+    index = SearchIndex(items, background=True)
+    index.build_step = 100
+    assert index.prefixes == {}  # Nothing is indexed up front
+    index.update(items[5])
+    items[5].text = "edited"
+    index.update(items[5])
+    index.remove(items[7])
+    index.insert(items[7], items[6], items[8])
+    index.remove(items[9])
+    index.add(Task("task a new"))
+    shown = items[:9] + items[10:] + [index.search("new")[0]]
+    queries = ["", "task a", "a", "edited", "item12", "item1.", "item123456789x", "task zz"]
+    expected = {query: [item for item in shown if all(any(word.startswith(part) for word in item.text.lower().split())
+                                                          for part in query.split())]
+                for query in queries}
+    while True:
+        for query in queries:
+            assert index.search(query) == expected[query], query
+        if not index.index_some():
+            break
+    assert not index.pending
+    for query in queries:
+        assert index.search(query) == expected[query], query
+    assert items[9] not in index.prefixes["task"]
@@ -0,0 +1,42 @@
+"""Storage's background writer, with two processes (here, two Storage objects) saving to one database."""
+from storage import Storage
+from tracker import Task, make_item
+
+
+def saved_texts(storage):
+    return [row[1] for row in storage.load("task")]
+
+
+def test_ids_taken_by_another_process_are_moved(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    app = Storage(path)
+    app.insert(Task("First"))
+    app.close()
+
+    command_line = Storage(path)
+    command_line.load_counters()
+    command_line.insert(Task("From the command line"))  # Takes the id the app hands out next
+    command_line.close()
+
+    task = Task("From the app")
+    app.insert(task)
+    task.text = "From the app, edited"
+    app.update(task)  # Queued with the id handed out, before the writer moved it
+    app.close()
+    assert task.id == 3
+    assert saved_texts(app) == ["First", "From the command line", "From the app, edited"]
+
+    app.update(task)  # Written under the new id from now on
+    app.insert_many("task", [make_item("task", "Batch")])
+    app.close()
+    assert saved_texts(app)[-1] == "Batch"
+
+
+def test_a_failed_write_does_not_stop_the_writer(tmp_path, capsys):
+    storage = Storage(str(tmp_path / "tasks.db"))
+    storage.write("UPDATE no_such_table SET x = 1", ())
+    for number in range(150):  # More than the queue holds, so a dead writer would block here
+        storage.insert(Task(f"Task {number}"))
+    storage.close()
+    assert len(saved_texts(storage)) == 150
+    assert "no_such_table" in capsys.readouterr().err
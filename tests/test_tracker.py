@@ -0,0 +1,131 @@
+"""Tracker against a temporary database, no display needed."""
+import random
+import sys
+import time
+
+import pytest
+
+import tracker
+from history import TASK_DONE
+from tracker import EXAMPLE_TASKS, Tracker
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "tasks.db")
+
+
+@pytest.fixture
+def app_tracker(db_path):
+    opened = Tracker(db_path)
+    yield opened
+    opened.close()
+
+
+def texts(items):
+    return [item.text for item in items]
+
+
+def test_new_database_has_the_examples(app_tracker):
+    assert texts(app_tracker.items("task")) == EXAMPLE_TASKS
+    assert app_tracker.get(3).text == EXAMPLE_TASKS[2]  # Read back on another connection straight away
+    assert [row[1] for row in app_tracker.storage.iterate("task")] == EXAMPLE_TASKS
+
+
+def test_added_items_are_saved(db_path, app_tracker):
+    item = app_tracker.add("task", "Water the plants")
+    app_tracker.add("reward", "Ice cream")
+    app_tracker.close()
+    reopened = Tracker(db_path)
+    try:
+        assert texts(reopened.items("task"))[-1] == "Water the plants"
+        assert texts(reopened.items("reward"))[-1] == "Ice cream"
+        assert reopened.get(item.id).text == "Water the plants"
+    finally:
+        reopened.close()
+
+
+def test_remove_undo_and_redo(db_path, app_tracker):
+    tasks = app_tracker.items("task")
+    first = tasks[0]
+    app_tracker.remove(first, 0)
+    assert first not in tasks
+    app_tracker.undo()
+    assert tasks[0] is first
+    app_tracker.redo()
+    assert texts(tasks) == EXAMPLE_TASKS[1:]
+    app_tracker.close()
+    reopened = Tracker(db_path)
+    try:
+        assert texts(reopened.items("task")) == EXAMPLE_TASKS[1:]
+    finally:
+        reopened.close()
+
+
+def test_undo_add(app_tracker):
+    tasks = app_tracker.items("task")
+    app_tracker.add("task", "Oops")
+    app_tracker.undo()
+    assert texts(tasks) == EXAMPLE_TASKS
+
+
+def test_complete_is_logged_and_can_be_undone(app_tracker):
+    task = app_tracker.items("task")[0]
+    app_tracker.set_complete(task, True)
+    assert task.complete
+    assert app_tracker.history.day()[TASK_DONE] == 1
+    app_tracker.undo()
+    assert not task.complete
+    assert app_tracker.get(task.id) is not None
+
+
+def test_completing_a_repeating_task_moves_it_on(app_tracker):
+    task = app_tracker.add("task", "Pay rent", due=1_000_000.0, repeat="weekly")
+    app_tracker.set_complete(task, True, now=1_000_000.0)
+    assert not task.complete
+    assert task.due == pytest.approx(1_000_000.0 + 7 * 24 * 60 * 60, abs=60 * 60)  # Give or take a clock change
+
+
+def test_pick_leaves_out_completed_items(app_tracker):
+    tasks = app_tracker.items("task")
+    for task in tasks[1:]:
+        app_tracker.set_complete(task, True)
+    rng = random.Random(1)
+    assert {app_tracker.pick("task", rng) for _ in range(20)} == {tasks[0]}
+    app_tracker.set_complete(tasks[0], True)
+    assert app_tracker.pick("task", rng) is None
+
+
+def test_pick_follows_weights(app_tracker):
+    tasks = app_tracker.items("task")
+    for task in tasks[1:]:
+        app_tracker.set_weight(task, tracker.MIN_WEIGHT)
+    app_tracker.set_weight(tasks[0], tracker.MAX_WEIGHT)
+    rng = random.Random(2)
+    picks = [app_tracker.pick("task", rng) for _ in range(200)]
+    assert picks.count(tasks[0]) > 150
+
+
+def run_cli(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["tracker.py", *args])
+    return tracker.main()
+
+
+def test_cli_due_lists_every_dated_task_soonest_first(monkeypatch, capsys, db_path):
+    opened = Tracker(db_path)
+    opened.add("task", "Far off", due=time.time() + 60 * 24 * 60 * 60)
+    opened.add("task", "Tomorrow", due=time.time() + 20 * 60 * 60)
+    opened.set_complete(opened.add("task", "Done already", due=time.time() + 60), True)
+    opened.close()
+    assert run_cli(monkeypatch, "--db", db_path, "due") == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split("] ")[1].split("  due")[0] for line in lines] == ["Tomorrow", "Far off"]
+    assert run_cli(monkeypatch, "--db", db_path, "due", "--limit", "1") == 0
+    assert "Far off" not in capsys.readouterr().out
+
+
+def test_cli_reads_a_new_database(monkeypatch, capsys, db_path):
+    assert run_cli(monkeypatch, "--db", db_path, "list") == 0
+    assert EXAMPLE_TASKS[0] in capsys.readouterr().out
+    assert run_cli(monkeypatch, "--db", db_path + ".2", "complete", "3") == 0
+    assert f"[x] {EXAMPLE_TASKS[2]}" in capsys.readouterr().out
@@ -0,0 +1,9 @@
+"""Reading records from the import formats."""
+from transfer import read_jsonl
+
+
+def test_jsonl_flags_read_like_csv():
+    lines = ['{"text": "a", "complete": "false", "bingo_marked": "no"}',
+             '{"text": "b", "complete": true, "bingo_marked": "yes"}',
+             '{"text": "c", "complete": 0}']
+    assert [(record.complete, record.bingo_marked) for record in read_jsonl(lines)] == [(False, False), (True, True), (False, False)]
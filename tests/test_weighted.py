@@ -0,0 +1,83 @@
+"""Alias tables and the block-based weighted sampler."""
+import random
+from collections import Counter
+
+import pytest
+
+import wheel_physics
+from weighted import WeightedSampler, alias_table
+
+
+def table_shares(table):
+    """The probability an alias table gives each index."""
+    probabilities, aliases = table
+    count = len(probabilities)
+    shares = [probability / count for probability in probabilities]
+    for index, alias in enumerate(aliases):
+        shares[alias] += (1 - probabilities[index]) / count
+    return shares
+
+
+@pytest.mark.parametrize("weights", [[1], [1, 1, 1], [1, 2, 3, 4], [0, 5, 0, 1], [0.001, 1000, 3.5, 7, 7, 0.2]])
+def test_alias_table_gives_each_index_its_share(weights):
+    total = sum(weights)
+    assert table_shares(alias_table(weights)) == pytest.approx([weight / total for weight in weights])
+
+
+def chi_square(counts, weights, picks):
+    total = sum(weights.values())
+    return sum((counts[item] - picks * weight / total) ** 2 / (picks * weight / total) for item, weight in weights.items() if weight)
+
+
+def make_sampler(weights):
+    sampler = WeightedSampler(weight=weights.__getitem__)
+    sampler.block_size = 4  # Several blocks even for a few items
+    for item in weights:
+        sampler.add(item)
+    return sampler
+
+
+def test_picks_follow_the_weights():
+    weights = {f"item {i}": (i % 5) + 0.5 for i in range(30)}
+    sampler = make_sampler(weights)
+    rng = random.Random(7)
+    picks = 60_000
+    counts = Counter(sampler.pick(rng) for _ in range(picks))
+    assert chi_square(counts, weights, picks) < 70  # 29 degrees of freedom, p < 0.001 above about 58
+
+
+def test_updates_and_removals():
+    weights = {f"item {i}": 1.0 for i in range(10)}
+    sampler = make_sampler(weights)
+    weights["item 3"] = 0.0
+    sampler.update("item 3")
+    weights["item 8"] = 9.0
+    sampler.update("item 8")
+    for item in ("item 0", "item 9", "item 5"):  # From the first, last and a middle block
+        sampler.remove(item)
+        del weights[item]
+    assert len(sampler) == 7
+    assert "item 0" not in sampler
+    assert sampler.total() == pytest.approx(sum(weights.values()))
+    rng = random.Random(3)
+    picks = 30_000
+    counts = Counter(sampler.pick(rng) for _ in range(picks))
+    assert set(counts) == {item for item, weight in weights.items() if weight}
+    assert chi_square(counts, weights, picks) < 25  # 5 degrees of freedom
+
+
+def test_nothing_to_pick():
+    weights = {"a": 0.0, "b": 0.0}
+    sampler = make_sampler(weights)
+    assert sampler.pick(random.Random(1)) is None
+    for item in list(weights):
+        sampler.remove(item)
+    assert sampler.pick(random.Random(1)) is None
+    assert sampler.blocks == []
+
+
+def test_simulated_wheel_needs_a_weight():
+    pytest.importorskip("numpy")  # Only the simulator needs it
+    with pytest.raises(ValueError):
+        wheel_physics.simulate([0, 0], 10)
+    assert list(wheel_physics.simulate([0, 1, 3], 4000, seed=1)) == [0, pytest.approx(1000, abs=120), pytest.approx(3000, abs=120)]
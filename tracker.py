@@ -0,0 +1,438 @@
+"""Tasks, rewards, saving them and picking one at random, without pygame.
+
+The app's window is one client of this module; scripts and the command line
+are others. Nothing here opens a display, so it imports in milliseconds:
+
+    python tracker.py add "Water the plants"
+    python tracker.py add "Ice cream" --kind reward
+    python tracker.py add "Pay rent" --due 2026-11-01 --repeat monthly
+    python tracker.py list                  # every task, with its id
+    python tracker.py due                   # tasks not done yet with a due date, soonest first
+    python tracker.py complete 12           # mark task or reward 12 done (--undo to reopen it)
+    python tracker.py pick --kind reward    # a random reward that has not been redeemed
+    python tracker.py stats                 # tasks done each day this week, and more
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+from history import History, TASK_DONE, TASK_REOPENED, REWARD_REDEEMED, REWARD_RETURNED, BINGO, tasks_done, rewards_redeemed
+from indexed_list import IndexedList
+from journal import Journal, MAX_BYTES
+from scheduler import Scheduler, format_due, next_due, parse_due, parse_repeat
+from storage import Storage
+from weighted import WeightedSampler
+
+
+DATABASE_PATH = os.environ.get("TASKTRACKER_DB", "tasktracker.db")  # Where tasks, rewards and bingo marks are saved
+MIN_WEIGHT, MAX_WEIGHT = 1 / 64, 64.0  # How far an item's pick weight can be turned down or up
+DUE_SOON = 24 * 60 * 60  # Seconds before its due date that a task counts as due soon
+DUE_SOON_BOOST = 4.0  # Tasks due soon (or overdue) are this many times more likely to be picked
+
+EXAMPLE_TASKS = [
+    "Go Shopping",
+    "Clean my Room",
+    "Finish Coursework",
+    "Call mom",
+    "Go on a walk",
+    "Read a book",
+    "Write some code",
+    "Pay bills",
+    "Plan weekend trip",
+    "Check emails",
+    "Walk the dog",
+    "Organize workspace",
+    "Fix bugs in the project",
+    "Check trains",
+]
+EXAMPLE_REWARDS = [
+    "Have a Hot Chocolate",
+    "Takeaway tonight",
+    "Movie night",
+    "Weekend trip",
+    "Spa evening",
+    "Gift card",
+    "Chocolate",
+    "Watch YouTube",
+]
+
+
+class Task:
+    kind = "task"  # Which list the item is saved in
+    __slots__ = ("text", "complete", "bingo_marked", "weight", "due", "repeat", "id")  # No per-task __dict__, keeps huge lists small
+
+    def __init__(self, text):
+        self.text = text
+        self.complete = False  # Attribute to track if the task is complete
+        self.bingo_marked = False
+        self.weight = 1.0  # How likely the task is to be picked, compared with the others
+        self.due = None  # When the task is due (Unix time), None if it has no due date
+        self.repeat = None  # Repeat rule ("weekly", "3d", ...), None if the task only happens once
+        self.id = None  # Storage id, set once the task has been saved
+
+    def toggle_complete(self):
+        """Toggle the completion status of the task (Tracker.toggle_complete also saves it)."""
+        self.complete = not self.complete
+
+
+class Reward:
+    kind = "reward"  # Which list the item is saved in
+    __slots__ = ("text", "complete", "weight", "id")
+
+    def __init__(self, text):
+        self.text = text  # Reward description
+        self.complete = False  # Completion status of the reward (True if redeemed)
+        self.weight = 1.0  # How likely the reward is to be picked, compared with the others
+        self.id = None  # Storage id, set once the reward has been saved
+
+    def toggle_complete(self):
+        """Toggle the completion status of the reward (Tracker.toggle_complete also saves it)."""
+        self.complete = not self.complete
+
+
+ITEM_CLASSES = {"task": Task, "reward": Reward}
+FIELDS = ("text", "complete", "bingo_marked", "weight", "due", "repeat")  # What an edit can change (and undo put back)
+EXAMPLES = {"task": EXAMPLE_TASKS, "reward": EXAMPLE_REWARDS}
+
+
+def is_due_soon(item, now=None):
+    due = getattr(item, "due", None)
+    return due is not None and due - (time.time() if now is None else now) <= DUE_SOON
+
+
+def pick_weight(item):
+    """Weight an item is picked at random with (done tasks and redeemed rewards are never picked, tasks due soon more often)."""
+    if item.complete:
+        return 0.0
+    return item.weight * DUE_SOON_BOOST if is_due_soon(item) else item.weight
+
+
+def make_item(kind, text, complete=False, bingo_marked=False, weight=1.0, due=None, repeat=None, item_id=None):
+    """Create a task or reward with the given fields (bingo_marked, due and repeat are ignored for rewards)."""
+    item = ITEM_CLASSES[kind](text)
+    item.complete = complete
+    item.weight = weight
+    item.id = item_id
+    if hasattr(item, "due"):  # Rewards are not on the bingo board and are never due
+        item.bingo_marked = bingo_marked
+        item.due = due
+        item.repeat = repeat
+    return item
+
+
+class Tracker:
+    """The task and reward lists, kept in step with storage, the weighted random picks and the due dates.
+
+    A list is only loaded the first time it is asked for, so adding an item or
+    marking one done by id never reads the rest. Every task with a due date has
+    a "soon" event (DUE_SOON before it is due) and a "due" event (the reminder)
+    in the scheduler; run_due() handles the ones whose time has come.
+
+    Adding, removing and editing items in a loaded list goes in the journal,
+    as the few values needed to put it back, so it can be undone and redone.
+    """
+    def __init__(self, path=DATABASE_PATH, history_path=None, journal_bytes=MAX_BYTES):
+        self.storage = Storage(path)
+        self.journal = Journal(self.apply_change, journal_bytes, on_forget=self.forget_change)
+        self.history = History(history_path or os.path.splitext(path)[0] + "-history.log")  # Completions, bingos and redeemed rewards
+        self.lists = {}  # kind -> IndexedList of items, once loaded
+        self.samplers = {}  # kind -> WeightedSampler over the list, built the first time one is needed
+        self.scheduler = Scheduler()  # Coming "soon" and "due" events of the loaded tasks
+        self.due_soon = set()  # Loaded tasks not done yet that are due within DUE_SOON (or overdue)
+        if self.storage.is_new:
+            self.add_examples()
+        else:
+            self.storage.load_counters()  # New items go after the saved ones
+
+    def add_examples(self):
+        """Fill a new database with the example tasks and rewards."""
+        for kind, texts in EXAMPLES.items():
+            items = [make_item(kind, text) for text in texts]
+            self.storage.insert_many(kind, items)  # Gives them their ids
+            self.lists[kind] = IndexedList(items)
+        self.storage.is_new = False
+        self.storage.close()  # Wait for them to be written, so reads on other connections (get, iterate) see them
+
+    def items(self, kind):
+        """The list of tasks or rewards, loading it if needed."""
+        if kind not in self.lists:
+            self.lists[kind] = IndexedList(make_item(kind, *row[1:], item_id=row[0]) for row in self.storage.load(kind))
+            now = time.time()
+            for item in self.lists[kind]:
+                self.schedule(item, now)
+        return self.lists[kind]
+
+    def sampler(self, kind):
+        if kind not in self.samplers:
+            self.samplers[kind] = WeightedSampler(self.items(kind), pick_weight)
+        return self.samplers[kind]
+
+    def pick(self, kind, rng=random):
+        """Return a random task or reward, weighted and leaving out completed ones (None if there are none)."""
+        return self.sampler(kind).pick(rng)
+
+    def get(self, item_id):
+        """Return the saved item with an id (not the one in a loaded list), or None."""
+        found = self.storage.get(item_id)
+        if found is None:
+            return None
+        kind, row = found
+        return make_item(kind, *row[1:], item_id=row[0])
+
+    def add(self, kind, text, due=None, repeat=None):
+        """Save a new item at the end of its list and return it."""
+        item = make_item(kind, text, due=due, repeat=repeat)
+        self.storage.insert(item)
+        if kind in self.lists:
+            self.attach(item)
+            self.journal.record(("remove", item, len(self.lists[kind]) - 1))
+        return item
+
+    def add_records(self, kind, records):
+        """Add a batch of records (see transfer.Record) with one save, and return the new items.
+
+        Imports go at the end of the list and are not journaled (they can be huge), which leaves
+        the positions the journal keeps valid.
+        """
+        items = [make_item(kind, *record) for record in records]
+        self.storage.insert_many(kind, items)  # Gives them their ids
+        if kind in self.lists:
+            self.lists[kind].extend(items)
+            now = time.time()
+            for item in items:
+                if kind in self.samplers:
+                    self.samplers[kind].add(item)
+                self.schedule(item, now)
+        return items
+
+    def remove(self, item, index=None):
+        """Delete an item (index is its position in the list, if known, which saves looking for it)."""
+        self.storage.delete(item)
+        if item.kind not in self.lists:
+            self.storage.purge(item)  # Nothing to undo it from
+            return
+        if index is None:
+            index = self.lists[item.kind].index(item)
+        self.detach(item, index)
+        self.journal.record(("insert", item, index))
+
+    def attach(self, item, index=None):
+        """Put an item in its loaded list (at the end, or at index), the random picks and the schedule."""
+        if index is None:
+            self.lists[item.kind].append(item)
+        else:
+            self.lists[item.kind].insert(index, item)
+        if item.kind in self.samplers:
+            self.samplers[item.kind].add(item)
+        self.schedule(item)
+
+    def detach(self, item, index):
+        """Take an item at index out of its loaded list, the random picks and the schedule."""
+        del self.lists[item.kind][index]
+        if item.kind in self.samplers:
+            self.samplers[item.kind].remove(item)
+        self.scheduler.cancel(item)
+        self.due_soon.discard(item)
+
+    def update(self, item, **fields):
+        """Change some of an item's fields (text=..., bingo_marked=..., see FIELDS), save it and journal the change."""
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise TypeError(f"can't update {', '.join(sorted(unknown))}")
+        self.journal.record(("fields", item, tuple((name, getattr(item, name)) for name in fields)))
+        for name, value in fields.items():
+            setattr(item, name, value)
+        self.save(item)
+
+    def save(self, item):
+        """Save an item's text, flags, weight and due date."""
+        self.storage.update(item)
+        if item.kind in self.lists:
+            self.schedule(item)  # Before the sampler reads the weight, which depends on whether it is due soon
+        if item.kind in self.samplers and item in self.samplers[item.kind]:
+            self.samplers[item.kind].update(item)  # It may have been completed, re-weighted or re-dated
+
+    def set_complete(self, item, complete, now=None):
+        """Mark an item done or not and save it.
+
+        Completing a repeating task moves it on to its next due date instead, so it stays on the list.
+        """
+        names = ("complete", "due") if item.kind == "task" else ("complete",)
+        self.journal.record(("fields", item, tuple((name, getattr(item, name)) for name in names)))
+        self.log_completion(item, complete, now)
+        if complete and not item.complete and getattr(item, "repeat", None) and item.due is not None:
+            item.due = next_due(item.due, item.repeat, time.time() if now is None else now)
+        else:
+            item.complete = complete
+        self.save(item)
+
+    def log_completion(self, item, complete, now=None):
+        """Add a task being done or reopened (or a reward redeemed or returned) to the history."""
+        if complete != item.complete:
+            events = (TASK_DONE, TASK_REOPENED) if item.kind == "task" else (REWARD_REDEEMED, REWARD_RETURNED)
+            self.history.record(events[0] if complete else events[1], item.id, now)
+
+    def toggle_complete(self, item):
+        self.set_complete(item, not item.complete)
+
+    def record_bingo(self):
+        self.history.record(BINGO)
+
+    def schedule(self, item, now=None):
+        """Put a loaded task's coming events in the scheduler (after it was added, loaded or changed)."""
+        self.scheduler.cancel(item)
+        self.due_soon.discard(item)
+        due = getattr(item, "due", None)
+        if due is None or item.complete:
+            return
+        now = time.time() if now is None else now
+        if is_due_soon(item, now):
+            self.due_soon.add(item)
+        else:
+            self.scheduler.schedule(item, "soon", due - DUE_SOON)
+        if due > now:
+            self.scheduler.schedule(item, "due", due)  # Overdue tasks are not reminded of again
+
+    def next_event_time(self):
+        """When run_due next has something to do, or None."""
+        return self.scheduler.next_time()
+
+    def run_due(self, now=None):
+        """Handle the events whose time has come and return the tasks that have just come due."""
+        reminders = []
+        for item, event in self.scheduler.pop_due(time.time() if now is None else now):
+            if event == "soon":
+                self.due_soon.add(item)
+                if item.kind in self.samplers:
+                    self.samplers[item.kind].update(item)  # Now picked more often
+            else:
+                reminders.append(item)
+        return reminders
+
+    def due_soon_items(self):
+        """Tasks due soon or overdue, soonest first (only these few are sorted, not the whole list)."""
+        return sorted(self.due_soon, key=lambda item: item.due)
+
+    def set_weight(self, item, weight):
+        self.update(item, weight=min(MAX_WEIGHT, max(MIN_WEIGHT, weight)))
+
+    def undo(self):
+        """Undo the last add, remove or edit and return the change made (see apply_change), or None."""
+        return self.journal.undo()
+
+    def redo(self):
+        return self.journal.redo()
+
+    def apply_change(self, change):
+        """Make a journaled change and return the one that reverses it.
+
+        ("remove", item, index) takes an item out of its list, ("insert", item, index)
+        puts it back, and ("fields", item, ((name, value), ...)) sets fields.
+        """
+        action, item = change[0], change[1]
+        if action == "remove":
+            self.detach(item, change[2])
+            self.storage.delete(item)
+            return ("insert", item, change[2])
+        if action == "insert":
+            self.attach(item, change[2])
+            self.storage.restore(item)
+            return ("remove", item, change[2])
+        current = tuple((name, getattr(item, name)) for name, _ in change[2])
+        for name, value in change[2]:
+            if name == "complete":
+                self.log_completion(item, value)
+            setattr(item, name, value)
+        self.save(item)
+        return ("fields", item, current)
+
+    def forget_change(self, change):
+        """The journal dropped a change: an item whose removal can no longer be undone is deleted for good."""
+        if change[0] == "insert":
+            self.storage.purge(change[1])
+
+    def close(self):
+        """Finish saving."""
+        self.journal.clear()  # Removed items are deleted for good
+        self.storage.close()
+        self.history.close()
+
+
+def format_item(item):
+    done = "x" if item.complete else " "
+    weight = f"  x{item.weight:g}" if item.weight != 1 else ""
+    due = f"  due {format_due(item.due)}" if getattr(item, "due", None) is not None else ""
+    repeat = f" ({item.repeat})" if getattr(item, "repeat", None) else ""
+    return f"{item.id:6} [{done}] {item.text}{weight}{due}{repeat}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep track of tasks and rewards without opening the app.")
+    parser.add_argument("--db", default=DATABASE_PATH, help="the app's database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="add a task or reward")
+    add.add_argument("text")
+    add.add_argument("--kind", choices=list(ITEM_CLASSES), default="task")
+    add.add_argument("--due", type=parse_due, help="when a task is due, 2026-10-20 or 2026-10-20T17:30")
+    add.add_argument("--repeat", type=parse_repeat, help="daily, weekly, monthly, yearly, or like 3d, 2w, 6m")
+    show = commands.add_parser("list", help="list the tasks or rewards")
+    show.add_argument("--kind", choices=list(ITEM_CLASSES), default="task")
+    show.add_argument("--todo", action="store_true", help="leave out completed ones")
+    stats = commands.add_parser("stats", help="show how much was done each day")
+    stats.add_argument("--days", type=int, default=7)
+    due = commands.add_parser("due", help="list the tasks not done yet with a due date, soonest first")
+    due.add_argument("--limit", type=int, default=20)
+    complete = commands.add_parser("complete", help="mark a task done or a reward redeemed")
+    complete.add_argument("id", type=int)
+    complete.add_argument("--undo", action="store_true", help="mark it not done again")
+    pick = commands.add_parser("pick", help="pick a random task or reward that is not done")
+    pick.add_argument("--kind", choices=list(ITEM_CLASSES), default="task")
+    pick.add_argument("--seed", type=int, help="seed the random pick, to repeat it")
+    args = parser.parse_args()
+
+    tracker = Tracker(args.db)
+    try:
+        if args.command == "add":
+            if args.kind == "reward" and (args.due is not None or args.repeat):
+                parser.error("only tasks have due dates")
+            item = tracker.add(args.kind, args.text, args.due, args.repeat)
+            print(format_item(item))
+        elif args.command == "list":
+            for row in tracker.storage.iterate(args.kind):  # Streamed, however long the list is
+                item = make_item(args.kind, *row[1:], item_id=row[0])
+                if not (args.todo and item.complete):
+                    print(format_item(item))
+        elif args.command == "stats":
+            history = tracker.history
+            for date, counts in history.last_days(args.days):
+                print(f"{date:%a %Y-%m-%d}  {tasks_done(counts):4} tasks  {counts[BINGO]:3} bingos  {rewards_redeemed(counts):3} rewards")
+            week, total = history.week(), history.all_time
+            print(f"This week       {tasks_done(week):4} tasks  {week[BINGO]:3} bingos  {rewards_redeemed(week):3} rewards")
+            print(f"All time        {tasks_done(total):4} tasks  {total[BINGO]:3} bingos  {rewards_redeemed(total):3} rewards")
+        elif args.command == "due":
+            dated = (row for row in tracker.storage.iterate("task") if row[5] is not None and not row[2])  # Streamed
+            for row in heapq.nsmallest(args.limit, dated, key=lambda row: row[5]):
+                print(format_item(make_item("task", *row[1:], item_id=row[0])))
+        elif args.command == "complete":
+            item = tracker.get(args.id)
+            if item is None:
+                print(f"No task or reward has id {args.id}", file=sys.stderr)
+                return 1
+            tracker.set_complete(item, not args.undo)
+            print(format_item(item))
+        else:
+            item = tracker.pick(args.kind, random.Random(args.seed))
+            if item is None:
+                print(f"No {args.kind}s left to do!" if args.kind == "task" else "No rewards left!")
+                return 1
+            print(format_item(item))
+    finally:
+        tracker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Streaming import and export of tasks and rewards as CSV, JSON Lines or todo.txt.
+
+Readers and writers handle one record at a time, so a file of any size goes
+through in constant memory, and imports are saved in batches. Runs without
+opening a window:
+
+    python transfer.py import backlog.csv                # add tasks from a file
+    python transfer.py import ideas.txt --kind reward
+    python transfer.py export tasks.jsonl --db tasktracker.db
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from itertools import islice
+
+from scheduler import format_due, parse_due, parse_repeat, parse_schedule, schedule_tokens
+from storage import Storage
+
+
+Record = namedtuple("Record", ["text", "complete", "bingo_marked", "weight", "due", "repeat"], defaults=[1.0, None, None])
+TRUE_VALUES = {"1", "true", "yes", "y", "x", "done"}
+TODO_DATE = re.compile(r"\d{4}-\d{2}-\d{2} ")
+TODO_PRIORITY = re.compile(r"\([A-Z]\) ")
+BATCH_SIZE = 1000  # Records saved (or added to a list) at a time
+
+
+def is_true(value):
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def to_weight(value):
+    """Read a weight (blank means the usual 1), refusing negative ones."""
+    if value is None or str(value).strip() == "":
+        return 1.0
+    weight = float(value)
+    if not weight >= 0:
+        raise ValueError(f"weight must be 0 or more, not {value!r}")
+    return weight
+
+
+def to_due(value):
+    """Read a due date (blank or missing means none)."""
+    if value is None or str(value).strip() == "":
+        return None
+    return parse_due(str(value).strip())
+
+
+def to_repeat(value):
+    return None if value is None or str(value).strip() == "" else parse_repeat(str(value))
+
+
+def due_text(due):
+    return "" if due is None else format_due(due)
+
+
+def read_csv(lines):
+    """Read records from CSV with a text column and optional complete, bingo_marked, weight, due and repeat columns."""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "text" not in reader.fieldnames:
+        raise ValueError("CSV needs a 'text' column")
+    for row in reader:
+        if row["text"]:
+            yield Record(row["text"], is_true(row.get("complete") or ""), is_true(row.get("bingo_marked") or ""),
+                         to_weight(row.get("weight")), to_due(row.get("due")), to_repeat(row.get("repeat")))
+
+
+def read_jsonl(lines):
+    """Read records from JSON Lines, one object (or plain string) per line."""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        value = json.loads(line)
+        if isinstance(value, str):
+            yield Record(value, False, False)
+        elif isinstance(value, dict) and isinstance(value.get("text"), str):
+            yield Record(value["text"], is_true(value.get("complete") or ""), is_true(value.get("bingo_marked") or ""), to_weight(value.get("weight")),
+                         to_due(value.get("due")), to_repeat(value.get("repeat")))
+        else:
+            raise ValueError(f"line {line_number}: expected a string or an object with a 'text' string")
+
+
+def read_todo(lines):
+    """Read records from todo.txt, where a line starting with 'x ' is done (due: and rec: are kept, other dates dropped)."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        complete = line.startswith("x ")
+        if complete:
+            line = line[2:]
+        priority = TODO_PRIORITY.match(line)
+        prefix = priority.group() if priority else ""
+        line = line[len(prefix):]
+        for _ in range(2):  # Completion and creation dates
+            date = TODO_DATE.match(line)
+            if date:
+                line = line[date.end():]
+        text, due, repeat = parse_schedule(prefix + line)
+        yield Record(text, complete, False, 1.0, due, repeat)
+
+
+def write_csv(records, file):
+    writer = csv.writer(file)
+    writer.writerow(["text", "complete", "bingo_marked", "weight", "due", "repeat"])
+    count = 0
+    for count, record in enumerate(records, 1):
+        writer.writerow([record.text, int(record.complete), int(record.bingo_marked), record.weight, due_text(record.due),
+                         record.repeat or ""])
+    return count
+
+
+def write_jsonl(records, file):
+    count = 0
+    for count, record in enumerate(records, 1):
+        file.write(json.dumps({"text": record.text, "complete": record.complete, "bingo_marked": record.bingo_marked,
+                               "weight": record.weight, "due": None if record.due is None else format_due(record.due),
+                               "repeat": record.repeat}) + "\n")
+    return count
+
+
+def write_todo(records, file):
+    """Write todo.txt lines (bingo marks and weights have no place in the format and are left out)."""
+    count = 0
+    for count, record in enumerate(records, 1):
+        file.write(("x " if record.complete else "") + record.text.replace("\n", " ") + schedule_tokens(record.due, record.repeat) + "\n")
+    return count
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "todo": read_todo}
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "todo": write_todo}
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".txt": "todo"}
+
+
+def format_of(path):
+    """Work out the format from the file extension."""
+    for extension, file_format in EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return file_format
+    raise ValueError(f"Can't tell the format of {path}, use one of {', '.join(EXTENSIONS)}")
+
+
+def read(path, file_format=None):
+    """Yield the records in a file one at a time."""
+    file_format = file_format or format_of(path)
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from READERS[file_format](file)
+
+
+def write(records, path, file_format=None):
+    """Write records to a file as they arrive and return how many were written."""
+    file_format = file_format or format_of(path)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        return WRITERS[file_format](records, file)
+
+
+def batched(records, size=BATCH_SIZE):
+    """Group a stream of records into lists of at most size."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export tasks and rewards without opening the app.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="file to read or write (.csv, .jsonl or todo .txt)")
+    parser.add_argument("--kind", choices=["task", "reward"], default="task")
+    parser.add_argument("--format", choices=list(READERS), help="file format, if the extension doesn't say")
+    parser.add_argument("--db", default=os.environ.get("TASKTRACKER_DB", "tasktracker.db"), help="the app's database")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="records saved at a time")
+    args = parser.parse_args()
+
+    storage = Storage(args.db)
+    try:
+        if args.action == "import":
+            storage.load_counters()  # Carry on from the ids and positions already saved
+            count = 0
+            for batch in batched(read(args.path, args.format), args.batch):
+                storage.insert_many(args.kind, batch)
+                count += len(batch)
+            print(f"Imported {count} {args.kind}s from {args.path}")
+        else:
+            records = (Record(*row[1:]) for row in storage.iterate(args.kind))
+            count = write(records, args.path, args.format)
+            print(f"Exported {count} {args.kind}s to {args.path}")
+    except (OSError, ValueError, csv.Error) as error:
+        print(f"{args.action.capitalize()} failed: {error}", file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
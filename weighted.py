@@ -0,0 +1,123 @@
+"""Weighted random picks in O(1) time, with alias tables that only rebuild the part of the pool that changed."""
+import random
+
+
+def alias_table(weights):
+    """Build Vose's alias table for a list of weights, as (probabilities, aliases)."""
+    count = len(weights)
+    total = sum(weights)
+    probabilities = [1.0] * count
+    aliases = list(range(count))
+    if not total:
+        return probabilities, aliases  # Nothing to pick, the caller checks the total first
+    scaled = [weight * count / total for weight in weights]
+    small = [i for i, value in enumerate(scaled) if value < 1]
+    large = [i for i, value in enumerate(scaled) if value >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probabilities[less] = scaled[less]
+        aliases[less] = more
+        scaled[more] -= 1 - scaled[less]
+        (small if scaled[more] < 1 else large).append(more)
+    return probabilities, aliases  # Anything left over (from rounding) keeps probability 1
+
+
+def alias_pick(table, rng):
+    """Pick an index from an alias table with one random number."""
+    probabilities, aliases = table
+    spot = rng.random() * len(probabilities)
+    column = int(spot)
+    return column if spot - column < probabilities[column] else aliases[column]
+
+
+class WeightedSampler:
+    """Picks items with probability proportional to their weight.
+
+    Items are kept in blocks of block_size, each with its own alias table, plus
+    one alias table over the block totals. A pick is two table lookups. Adding,
+    removing or re-weighting an item only marks its block as stale, and the next
+    pick rebuilds that block and the (small) table over blocks.
+    """
+    block_size = 256
+
+    def __init__(self, items=(), weight=lambda item: 1.0):
+        self.weight = weight  # item -> weight, 0 leaves the item out of picks
+        self.blocks = []  # Lists of items
+        self.block_weights = []  # Weights of the items in each block
+        self.tables = []  # Alias table of each block
+        self.totals = []  # Total weight of each block
+        self.where = {}  # item -> (block, slot)
+        self.stale = set()  # Blocks whose table needs rebuilding
+        self.top = None  # Alias table over the block totals, None when it needs rebuilding
+        self.total_weight = 0.0
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, item):
+        return item in self.where
+
+    def changed(self, block):
+        self.stale.add(block)
+        self.top = None
+
+    def add(self, item):
+        if not self.blocks or len(self.blocks[-1]) >= self.block_size:
+            self.blocks.append([])
+            self.block_weights.append([])
+            self.tables.append(None)
+            self.totals.append(0.0)
+        block = len(self.blocks) - 1
+        self.where[item] = (block, len(self.blocks[block]))
+        self.blocks[block].append(item)
+        self.block_weights[block].append(float(self.weight(item)))
+        self.changed(block)
+
+    def update(self, item):
+        """Read an item's weight again (after it was completed or re-weighted)."""
+        block, slot = self.where[item]
+        weight = float(self.weight(item))
+        if weight != self.block_weights[block][slot]:
+            self.block_weights[block][slot] = weight
+            self.changed(block)
+
+    def remove(self, item):
+        """Take an item out, moving the last item into its place."""
+        block, slot = self.where.pop(item)
+        last_block = len(self.blocks) - 1
+        last_item = self.blocks[last_block].pop()
+        last_weight = self.block_weights[last_block].pop()
+        if last_item is not item:
+            self.blocks[block][slot] = last_item
+            self.block_weights[block][slot] = last_weight
+            self.where[last_item] = (block, slot)
+            self.changed(block)
+        if self.blocks[last_block]:
+            self.changed(last_block)
+        else:
+            for column in (self.blocks, self.block_weights, self.tables, self.totals):
+                column.pop()
+            self.stale.discard(last_block)
+            self.top = None
+
+    def rebuild(self):
+        for block in self.stale:
+            self.tables[block] = alias_table(self.block_weights[block])
+            self.totals[block] = sum(self.block_weights[block])
+        self.stale.clear()
+        self.top = alias_table(self.totals)
+        self.total_weight = sum(self.totals)
+
+    def total(self):
+        if self.top is None:
+            self.rebuild()
+        return self.total_weight
+
+    def pick(self, rng=random):
+        """Return a random item (None if there are none with a weight above 0)."""
+        if self.total() <= 0:
+            return None
+        block = alias_pick(self.top, rng)
+        return self.blocks[block][alias_pick(self.tables[block], rng)]
@@ -0,0 +1,130 @@
+"""Time-based spin physics for the randomiser wheel, plus a NumPy batch simulator.
+
+The wheel slows down exponentially, so its angle at any time after a spin
+starts has a closed form. That makes the outcome depend only on the start
+angle and speed, not on the frame rate or on how time is chopped into frames.
+
+Run this file to spin the wheel millions of times without a display, the way
+the app does it (weighted pick, landing speed, then the segment under the pointer):
+
+    python wheel_physics.py --segments 14 --spins 1000000 --seed 1
+    python wheel_physics.py --weights 1 1 4 0.5 --spins 1000000
+"""
+import argparse
+import itertools
+import math
+import random
+import time
+
+from weighted import WeightedSampler
+
+
+FRICTION = -60 * math.log(0.98)  # Per second, the same slow down as the old 0.98 per frame at 60 FPS
+STOP_SPEED = 0.5 * 60  # Degrees per second below which the wheel stops
+MIN_SPEED, MAX_SPEED = 20 * 60, 30 * 60  # Range of starting speeds in degrees per second
+POINTER_ANGLE = 270  # Direction of the pointer (screen angles go clockwise, so 270 is straight up)
+
+
+def start_speed(rng, size=None):
+    """Pick a random starting speed (or size of them from a NumPy Generator)."""
+    if size is None:
+        return rng.uniform(MIN_SPEED, MAX_SPEED)
+    return rng.uniform(MIN_SPEED, MAX_SPEED, size)
+
+
+def stop_time(speed):
+    """Seconds until a wheel spun at this speed stops."""
+    return math.log(speed / STOP_SPEED) / FRICTION
+
+
+def spin_state(start_angle, speed, t):
+    """Angle and speed t seconds after a spin started."""
+    decay = math.exp(-FRICTION * t)
+    return start_angle + speed * (1 - decay) / FRICTION, speed * decay
+
+
+def rest_angle(start_angle, speed):
+    """Angle the wheel comes to rest at (works on floats and NumPy arrays)."""
+    return start_angle + (speed - STOP_SPEED) / FRICTION
+
+
+def landing_speed(start_angle, face_angle, rng, pointer_angle=POINTER_ANGLE, size=None):
+    """Pick a starting speed in the usual range that stops the wheel with face_angle under the pointer.
+
+    The stopping distance is (speed - STOP_SPEED) / FRICTION, and the usual speeds
+    cover more than one full turn of distance, so every face angle can be reached.
+    With size, the angles are NumPy arrays and rng a NumPy Generator.
+    """
+    shortest = (MIN_SPEED - STOP_SPEED) / FRICTION
+    longest = (MAX_SPEED - STOP_SPEED) / FRICTION
+    extra = (pointer_angle - face_angle - start_angle - shortest) % 360  # Distance past the shortest spin to land there
+    turns = (longest - shortest - extra) // 360  # Full turns that still fit on top
+    if size is None:
+        distance = shortest + extra + 360 * rng.randint(0, int(turns))
+    else:
+        distance = shortest + extra + 360 * rng.integers(0, turns + 1, size)
+    return distance * FRICTION + STOP_SPEED
+
+
+def simulate(weights, spins, seed=None, fresh=False):
+    """Spin a wheel with segments of these weights many times and return how often each segment was picked.
+
+    Each spin goes the way SpinningWheel.start_spin and select_task do it: a
+    WeightedSampler picks the segment, a point inside it is chosen, landing_speed
+    gives a speed that stops there, and the segment is read back from the rest
+    angle by bisecting the segment ends. Like the app, each spin starts where the
+    last one stopped unless fresh is True, in which case every spin starts from angle 0.
+    """
+    import numpy as np  # Only needed for the simulator
+
+    total = sum(weights)
+    if total <= 0 or min(weights) < 0:
+        raise ValueError("weights must not be negative, and at least one must be above 0")
+    segment_ends = np.array(list(itertools.accumulate(weight * 360 / total for weight in weights)))
+    sampler = WeightedSampler(range(len(weights)), weights.__getitem__)
+    pick_rng = random.Random(seed)
+    picks = np.fromiter((sampler.pick(pick_rng) for _ in range(spins)), np.int64, spins)  # The only loop, the rest is batched
+
+    rng = np.random.default_rng(seed)
+    starts = np.concatenate(([0.0], segment_ends[:-1]))
+    face_angles = starts[picks] + (segment_ends - starts)[picks] * rng.uniform(0.1, 0.9, spins)  # Clear of the edges
+    if fresh:
+        start_angles = np.zeros(spins)
+    else:
+        # A spin stops with its face angle under the pointer, so the next one starts from there
+        start_angles = np.concatenate(([0.0], (POINTER_ANGLE - face_angles[:-1]) % 360))
+    speeds = landing_speed(start_angles, face_angles, rng, size=spins)
+    landed = (POINTER_ANGLE - rest_angle(start_angles, speeds)) % 360  # Part of the face under the pointer
+    picked = np.minimum(np.searchsorted(segment_ends, landed, side="right"), len(weights) - 1)
+    if not np.array_equal(picked, picks):
+        raise AssertionError(f"{np.count_nonzero(picked != picks)} spins stopped on a different segment than was picked")
+    return np.bincount(picked, minlength=len(weights))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spin the randomiser wheel many times without a display.")
+    parser.add_argument("--segments", type=int, default=14, help="number of items on the wheel, all weighted the same")
+    parser.add_argument("--weights", type=float, nargs="+", help="weight of each item on the wheel (instead of --segments)")
+    parser.add_argument("--spins", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--fresh", action="store_true", help="start every spin from angle 0")
+    args = parser.parse_args()
+
+    weights = args.weights or [1.0] * args.segments
+
+    start = time.perf_counter()
+    try:
+        counts = simulate(weights, args.spins, args.seed, args.fresh)
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - start
+
+    expected = [args.spins * weight / sum(weights) for weight in weights]
+    chi_square = sum((count - share) ** 2 / share for count, share in zip(counts, expected) if share)
+    for index, count in enumerate(counts):
+        print(f"segment {index:3}: {count:9} ({count / args.spins:.4%}, expected {expected[index] / args.spins:.4%})")
+    print(f"{args.spins} spins in {elapsed:.3f} s, chi-square {chi_square:.1f} with {len(weights) - 1} degrees of freedom")
+
+
+if __name__ == "__main__":
+    main()